@@ -0,0 +1,97 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+
+
+def token_cache_key(key):
+    return f'auth:token:{key}'
+
+
+def token_revoked_key(key):
+    return f'auth:revoked:{key}'
+
+
+class TokenCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+tokens = TokenCache(
+    settings.AUTH_TOKEN_CACHE_SIZE,
+    settings.AUTH_TOKEN_CACHE_TTL,
+)
+
+
+def discard_token(key):
+    tokens.discard(key)
+    if settings.AUTH_TOKEN_CACHE_SHARED:
+        cache.delete(token_cache_key(key))
+        cache.set(token_revoked_key(key), True, settings.AUTH_TOKEN_CACHE_TTL)
+
+
+def invalidate_token(key):
+    discard_token(key)
+    transaction.on_commit(lambda: discard_token(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        entry = tokens.get(key)
+        if (
+            entry is not None
+            and settings.AUTH_TOKEN_CACHE_SHARED
+            and cache.get(token_revoked_key(key))
+        ):
+            tokens.discard(key)
+            entry = None
+        if entry is None and settings.AUTH_TOKEN_CACHE_SHARED:
+            entry = cache.get(token_cache_key(key))
+            if entry is not None:
+                tokens.set(key, entry)
+        if entry is None:
+            entry = super().authenticate_credentials(key)
+            tokens.set(key, entry)
+            if settings.AUTH_TOKEN_CACHE_SHARED:
+                cache.set(
+                    token_cache_key(key),
+                    entry,
+                    settings.AUTH_TOKEN_CACHE_TTL,
+                )
+        user, token = entry
+        return copy.copy(user), token
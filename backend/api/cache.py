@@ -0,0 +1,110 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+RECIPES_VERSION_KEY = 'recipes:version'
+SHARED_VERSION_KEY = 'recipes:shared_version'
+HITS_KEY = 'recipes:cache_hits'
+MISSES_KEY = 'recipes:cache_misses'
+
+
+def recipe_version_key(pk):
+    return f'recipes:version:{pk}'
+
+
+def user_version_key(user_id):
+    return f'users:version:{user_id}'
+
+
+def get_versions(*keys):
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, settings.CACHE_VERSION_TIMEOUT)
+        versions.update(cache.get_many(list(missing)))
+    return [versions.get(key, missing.get(key)) for key in keys]
+
+
+def bump_versions(*keys):
+    version = time.time_ns()
+    cache.set_many(
+        {key: version for key in keys},
+        settings.CACHE_VERSION_TIMEOUT,
+    )
+
+
+def invalidate_recipe(pk):
+    transaction.on_commit(
+        lambda: bump_versions(RECIPES_VERSION_KEY, recipe_version_key(pk)),
+    )
+
+
+def invalidate_recipes(*pks):
+    keys = [RECIPES_VERSION_KEY, *map(recipe_version_key, pks)]
+    transaction.on_commit(lambda: bump_versions(*keys))
+
+
+def invalidate_shared():
+    transaction.on_commit(lambda: bump_versions(SHARED_VERSION_KEY))
+
+
+def invalidate_user(user_id):
+    transaction.on_commit(lambda: bump_versions(user_version_key(user_id)))
+
+
+def invalidate_users(*user_ids):
+    keys = list(map(user_version_key, user_ids))
+    transaction.on_commit(lambda: bump_versions(*keys))
+
+
+def list_cache_key(request):
+    params = sorted(
+        (key, value)
+        for key in request.query_params
+        for value in request.query_params.getlist(key)
+    )
+    digest = hashlib.md5(
+        f'{request.build_absolute_uri(request.path)}?{urlencode(params)}'
+        .encode(),
+    ).hexdigest()
+    versions = get_versions(RECIPES_VERSION_KEY, SHARED_VERSION_KEY)
+    return 'recipes:list:{}:{}:{}'.format(*versions, digest)
+
+
+def detail_cache_key(request, pk):
+    digest = hashlib.md5(
+        request.build_absolute_uri(request.path).encode(),
+    ).hexdigest()
+    versions = get_versions(recipe_version_key(pk), SHARED_VERSION_KEY)
+    return 'recipes:detail:{}:{}:{}'.format(*versions, digest)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def get_cached(key):
+    data = cache.get(key)
+    _count(MISSES_KEY if data is None else HITS_KEY)
+    return data
+
+
+def set_cached(key, data):
+    cache.set(key, data, settings.RECIPE_CACHE_TIMEOUT)
+
+
+def cache_stats():
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        'hits': stats.get(HITS_KEY, 0),
+        'misses': stats.get(MISSES_KEY, 0),
+    }
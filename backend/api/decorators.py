@@ -0,0 +1,53 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import patch_vary_headers
+from django.utils.http import (
+    http_date,
+    parse_etags,
+    parse_http_date_safe,
+    quote_etag,
+)
+from rest_framework.response import Response
+
+from api.cache import get_versions
+from foodgram.db_router import primary_if_changed
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        return etag in parse_etags(if_none_match)
+    if_modified_since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE', ''),
+    )
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def conditional_get(method):
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.method != 'GET':
+            return method(self, request, *args, **kwargs)
+        versions = get_versions(
+            *self.get_version_keys(request, *args, **kwargs),
+        )
+        etag = quote_etag(
+            hashlib.md5(
+                f'{request.get_full_path()}|{request.user.pk}|{versions}'
+                .encode(),
+            ).hexdigest(),
+        )
+        last_modified = max(versions) // 10 ** 9
+        if _not_modified(request, etag, last_modified):
+            response = Response(status=304)
+        else:
+            with primary_if_changed(versions):
+                response = method(self, request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ('Authorization',))
+        return response
+
+    return wrapper
@@ -0,0 +1,89 @@
+import csv
+import hashlib
+import io
+import json
+from itertools import chain, islice
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+
+BUFFER_CHUNKS = 500
+
+
+def txt_chunks(user, rows):
+    yield (
+        f'Список покупок {user.username}\n'
+        f'Дата: {timezone.now():%Y-%m-%d}\n\n'
+    )
+    separator = ''
+    for row in rows:
+        yield (
+            f'{separator}- {row["ingredient__name"]} '
+            f'({row["ingredient__measurement_unit"]})'
+            f' - {row["quantity"]}'
+        )
+        separator = '\n'
+
+
+def csv_chunks(user, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(*values):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield line('name', 'measurement_unit', 'amount')
+    for row in rows:
+        yield line(
+            row['ingredient__name'],
+            row['ingredient__measurement_unit'],
+            row['quantity'],
+        )
+
+
+def json_chunks(user, rows):
+    yield '['
+    separator = ''
+    for row in rows:
+        item = {
+            'name': row['ingredient__name'],
+            'measurement_unit': row['ingredient__measurement_unit'],
+            'amount': row['quantity'],
+        }
+        yield separator + json.dumps(item, ensure_ascii=False)
+        separator = ','
+    yield ']'
+
+
+EXPORTS = {
+    'txt': (txt_chunks, 'text/plain; charset=utf-8'),
+    'csv': (csv_chunks, 'text/csv; charset=utf-8'),
+    'json': (json_chunks, 'application/json'),
+}
+
+
+def shopping_list_response(request, rows, export_format):
+    make_chunks, content_type = EXPORTS[export_format]
+    chunks = make_chunks(request.user, rows)
+    head = list(islice(chunks, BUFFER_CHUNKS + 1))
+    if len(head) > BUFFER_CHUNKS:
+        response = StreamingHttpResponse(
+            (chunk.encode() for chunk in chain(head, chunks)),
+            content_type=content_type,
+        )
+    else:
+        content = ''.join(head).encode()
+        etag = quote_etag(hashlib.md5(content).hexdigest())
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponse(status=304)
+        else:
+            response = HttpResponse(content, content_type=content_type)
+            response['Content-Length'] = len(content)
+        response['ETag'] = etag
+    filename = f'{request.user.username}_shopping.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
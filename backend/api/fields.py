@@ -0,0 +1,30 @@
+from django.conf import settings
+from drf_base64.fields import Base64ImageField
+
+
+class RecipeImageField(Base64ImageField):
+    default_error_messages = {
+        'too_large': (
+            'Размер изображения не должен превышать {max_bytes} байт.'
+        ),
+        'too_many_pixels': (
+            'Изображение не должно быть больше {max_pixels} пикселей.'
+        ),
+    }
+
+    def to_internal_value(self, data):
+        max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+        if (
+            isinstance(data, str)
+            and data.startswith('data:')
+            and len(data.partition(';base64,')[2]) * 3 // 4 > max_bytes
+        ):
+            self.fail('too_large', max_bytes=max_bytes)
+        file = super().to_internal_value(data)
+        if file.size > max_bytes:
+            self.fail('too_large', max_bytes=max_bytes)
+        width, height = file.image.size
+        max_pixels = settings.RECIPE_IMAGE_MAX_PIXELS
+        if width * height > max_pixels:
+            self.fail('too_many_pixels', max_pixels=max_pixels)
+        return file
@@ -1,51 +1,101 @@
-from django.core.exceptions import ValidationError
-from django_filters.fields import MultipleChoiceField
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Exists, F, OuterRef, Q
 from django_filters.rest_framework import FilterSet, filters
 from django_filters.widgets import BooleanWidget
-from rest_framework.filters import SearchFilter
 
-from recipes.models import Recipe
+from api.membership import for_request
+from recipes.models import Recipe, Tag
 
-
-class TagsMultipleChoiceField(MultipleChoiceField):
-    def validate(self, value):
-        if self.required and not value:
-            raise ValidationError(
-                self.error_messages['required'],
-                code='required',
-            )
-        for val in value:
-            if val in self.choices and not self.valid_value(val):
-                raise ValidationError(
-                    self.error_messages['invalid_choice'],
-                    code='invalid_choice',
-                    params={'value': val},
-                )
-
-
-class TagsFilter(filters.AllValuesMultipleFilter):
-    field_class = TagsMultipleChoiceField
-
-
-class IngredientSearchFilter(SearchFilter):
-    search_param = 'name'
+User = get_user_model()
 
 
 class RecipeFilter(FilterSet):
-    author = filters.AllValuesMultipleFilter(
-        field_name='author__id',
+    author = filters.ModelMultipleChoiceFilter(
+        queryset=User.objects.all(),
+        method='filter_author',
         label='Автор',
     )
     is_in_shopping_cart = filters.BooleanFilter(
         widget=BooleanWidget(),
+        method='filter_is_in_shopping_cart',
         label='В корзине.',
     )
     is_favorited = filters.BooleanFilter(
         widget=BooleanWidget(),
+        method='filter_is_favorited',
         label='В избранных.',
     )
-    tags = TagsFilter(field_name='tags__slug')
+    tags = filters.ModelMultipleChoiceFilter(
+        queryset=Tag.objects.all(),
+        to_field_name='slug',
+        method='filter_tags',
+        label='Теги',
+    )
+    search = filters.CharFilter(method='filter_search', label='Поиск')
+    ordering = filters.ChoiceFilter(
+        choices=(('trending', 'По популярности'),),
+        method='filter_ordering',
+        label='Сортировка',
+    )
 
     class Meta:
         model = Recipe
-        fields = ['author', 'tags', 'is_in_shopping_cart', 'is_favorited']
+        fields = [
+            'author',
+            'tags',
+            'is_in_shopping_cart',
+            'is_favorited',
+            'search',
+            'ordering',
+        ]
+
+    def _filter_membership(self, queryset, ids, value):
+        if value:
+            return queryset.filter(id__in=ids)
+        return queryset.exclude(id__in=ids)
+
+    def filter_is_favorited(self, queryset, name, value):
+        membership = for_request(self.request)
+        return self._filter_membership(queryset, membership.favorites, value)
+
+    def filter_is_in_shopping_cart(self, queryset, name, value):
+        membership = for_request(self.request)
+        return self._filter_membership(queryset, membership.cart, value)
+
+    def filter_author(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(author__in=value)
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.annotate(
+            has_tags=Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe=OuterRef('pk'),
+                    tag__in=value,
+                ),
+            ),
+        ).filter(has_tags=True)
+
+    def filter_search(self, queryset, name, value):
+        if connections[queryset.db].vendor != 'postgresql':
+            return queryset.filter(
+                Q(name__icontains=value) | Q(text__icontains=value),
+            )
+        query = SearchQuery(value, config='russian')
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', '-pud_date')
+        )
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(
+            F('trending__score').desc(nulls_last=True),
+            '-pud_date',
+            '-id',
+        )
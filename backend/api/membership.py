@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from api.cache import get_versions, user_version_key
+from foodgram.db_router import primary
+from recipes.models import FavoriteRecipe, ShoppingCart
+from users.models import Follow
+
+REQUEST_ATTRIBUTE = '_membership'
+
+
+class Membership:
+    def __init__(self, favorites=(), cart=(), following=()):
+        self.favorites = frozenset(favorites)
+        self.cart = frozenset(cart)
+        self.following = frozenset(following)
+
+
+EMPTY = Membership()
+
+
+def membership_cache_key(user_id):
+    version, = get_versions(user_version_key(user_id))
+    return f'users:membership:{version}:{user_id}'
+
+
+def _values(model, user_id, field):
+    return list(
+        model.objects.filter(user=user_id)
+        .order_by()
+        .values_list(field, flat=True),
+    )
+
+
+def load(user_id):
+    return (
+        _values(FavoriteRecipe, user_id, 'recipe'),
+        _values(ShoppingCart, user_id, 'recipe'),
+        _values(Follow, user_id, 'author'),
+    )
+
+
+def get_membership(user_id):
+    key = membership_cache_key(user_id)
+    data = cache.get(key)
+    if data is None:
+        with primary():
+            data = load(user_id)
+        cache.set(key, data, settings.MEMBERSHIP_CACHE_TIMEOUT)
+    return Membership(*data)
+
+
+def for_request(request):
+    if request is None or not request.user.is_authenticated:
+        return EMPTY
+    membership = getattr(request, REQUEST_ATTRIBUTE, None)
+    if membership is None:
+        membership = get_membership(request.user.pk)
+        setattr(request, REQUEST_ATTRIBUTE, membership)
+    return membership
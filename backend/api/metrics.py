@@ -0,0 +1,185 @@
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from api.cache import cache_stats
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def new_series():
+    return {
+        'count': 0,
+        'seconds': 0.0,
+        'buckets': [0] * len(BUCKETS),
+        'queries': 0,
+        'sql_seconds': 0.0,
+        'statuses': defaultdict(int),
+    }
+
+
+_lock = threading.Lock()
+_series = defaultdict(new_series)
+_state = {'flushed_at': 0.0}
+
+
+class QueryTimer:
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - start
+
+
+def view_name(request):
+    match = request.resolver_match
+    if match is None:
+        return 'unresolved'
+    view = getattr(match.func, 'cls', None)
+    if view is None:
+        return match.func.__name__
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view.__name__}.{action}'
+
+
+def record(view, status, seconds, timer):
+    with _lock:
+        series = _series[view]
+        series['count'] += 1
+        series['seconds'] += seconds
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                series['buckets'][index] += 1
+                break
+        series['queries'] += timer.queries
+        series['sql_seconds'] += timer.seconds
+        series['statuses'][str(status)] += 1
+    if settings.METRICS_DIR:
+        flush()
+
+
+def flush(force=False):
+    now = time.monotonic()
+    interval = settings.METRICS_FLUSH_INTERVAL
+    if not force and now - _state['flushed_at'] < interval:
+        return
+    _state['flushed_at'] = now
+    with _lock:
+        data = json.dumps(_series)
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = os.path.join(settings.METRICS_DIR, f'metrics_{os.getpid()}.json')
+    with open(f'{path}.tmp', 'w') as file:
+        file.write(data)
+    os.replace(f'{path}.tmp', path)
+
+
+def merge(target, source):
+    for view, series in source.items():
+        merged = target[view]
+        for key in ('count', 'seconds', 'queries', 'sql_seconds'):
+            merged[key] += series[key]
+        for index, count in enumerate(series['buckets']):
+            merged['buckets'][index] += count
+        for status, count in series['statuses'].items():
+            merged['statuses'][status] += count
+
+
+def collect():
+    if not settings.METRICS_DIR:
+        with _lock:
+            return json.loads(json.dumps(_series))
+    flush(force=True)
+    collected = defaultdict(new_series)
+    pattern = os.path.join(settings.METRICS_DIR, 'metrics_*.json')
+    for path in glob.glob(pattern):
+        try:
+            with open(path) as file:
+                merge(collected, json.load(file))
+        except (OSError, ValueError):
+            continue
+    return collected
+
+
+def render():
+    lines = [
+        '# TYPE foodgram_request_duration_seconds histogram',
+    ]
+    collected = collect()
+    for view in sorted(collected):
+        series = collected[view]
+        cumulative = 0
+        for bound, count in zip(BUCKETS, series['buckets']):
+            cumulative += count
+            lines.append(
+                'foodgram_request_duration_seconds_bucket'
+                f'{{view="{view}",le="{bound}"}} {cumulative}',
+            )
+        lines += [
+            'foodgram_request_duration_seconds_bucket'
+            f'{{view="{view}",le="+Inf"}} {series["count"]}',
+            f'foodgram_request_duration_seconds_sum{{view="{view}"}} '
+            f'{series["seconds"]}',
+            f'foodgram_request_duration_seconds_count{{view="{view}"}} '
+            f'{series["count"]}',
+        ]
+    lines.append('# TYPE foodgram_request_queries_total counter')
+    for view in sorted(collected):
+        lines.append(
+            f'foodgram_request_queries_total{{view="{view}"}} '
+            f'{collected[view]["queries"]}',
+        )
+    lines.append('# TYPE foodgram_request_sql_seconds_total counter')
+    for view in sorted(collected):
+        lines.append(
+            f'foodgram_request_sql_seconds_total{{view="{view}"}} '
+            f'{collected[view]["sql_seconds"]}',
+        )
+    lines.append('# TYPE foodgram_responses_total counter')
+    for view in sorted(collected):
+        for status, count in sorted(collected[view]['statuses'].items()):
+            lines.append(
+                f'foodgram_responses_total{{view="{view}",status="{status}"}} '
+                f'{count}',
+            )
+    stats = cache_stats()
+    lines += [
+        '# TYPE foodgram_recipe_cache_hits_total counter',
+        f'foodgram_recipe_cache_hits_total {stats["hits"]}',
+        '# TYPE foodgram_recipe_cache_misses_total counter',
+        f'foodgram_recipe_cache_misses_total {stats["misses"]}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        record(
+            view_name(request),
+            response.status_code,
+            time.perf_counter() - start,
+            timer,
+        )
+        return response
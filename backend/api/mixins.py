@@ -1,32 +1,39 @@
-from django.db.models import F
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.status import (
+    HTTP_200_OK,
     HTTP_201_CREATED,
     HTTP_204_NO_CONTENT,
     HTTP_400_BAD_REQUEST,
 )
 from rest_framework.viewsets import ModelViewSet
 
+from api.cache import invalidate_recipe, invalidate_recipes, invalidate_user
+from api.membership import for_request
 from recipes.models import Recipe
 
 
 class GetIsSubscribedMixin:
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return user.follower.filter(author=obj.id).exists()
+        is_subscribed = getattr(obj, 'is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
+        membership = for_request(self.context.get('request'))
+        return obj.id in membership.following
 
 
 class GetIngredientsMixin:
     def get_ingredients(self, obj):
-        return obj.ingredients.values(
-            'id',
-            'name',
-            'measurement_unit',
-            amount=F('quantity_ingredients__amount'),
-        )
+        return [
+            {
+                'id': item.ingredient.id,
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in obj.quantity_ingredients.all()
+        ]
 
 
 class AddRemoveMethod(ModelViewSet):
@@ -35,6 +42,8 @@ class AddRemoveMethod(ModelViewSet):
         serializer = serializers(data=data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_recipe(pk)
+        invalidate_user(request.user.id)
         return Response(serializer.data, status=HTTP_201_CREATED)
 
     def _remove_method(self, request, pk, model):
@@ -43,8 +52,68 @@ class AddRemoveMethod(ModelViewSet):
         model_obj = model.objects.filter(user=user, recipe=recipe)
         if model_obj.exists():
             model_obj.delete()
+            invalidate_recipe(pk)
+            invalidate_user(user.id)
             return Response(status=HTTP_204_NO_CONTENT)
         return Response(
             {'error': 'Этого рецепта уже нет'},
             status=HTTP_400_BAD_REQUEST,
         )
+
+    def _batch_presence(self, request, ids, model):
+        return dict(
+            Recipe.objects.filter(pk__in=ids)
+            .annotate(
+                present=Exists(
+                    model.objects.filter(
+                        user=request.user,
+                        recipe=OuterRef('pk'),
+                    ),
+                ),
+            )
+            .order_by()
+            .values_list('pk', 'present'),
+        )
+
+    def _batch_response(self, ids, present, changed, status):
+        return Response(
+            {
+                'results': [
+                    {
+                        'id': pk,
+                        'status': (
+                            'not_found' if pk not in present
+                            else status if pk in changed
+                            else 'unchanged'
+                        ),
+                    }
+                    for pk in ids
+                ],
+            },
+            status=HTTP_200_OK,
+        )
+
+    def _add_batch(self, request, ids, model, counter):
+        present = self._batch_presence(request, ids, model)
+        added = [pk for pk in ids if pk in present and not present[pk]]
+        if added:
+            model.objects.bulk_create(
+                [model(user=request.user, recipe_id=pk) for pk in added],
+                ignore_conflicts=True,
+            )
+            Recipe.objects.filter(pk__in=added).bump(**{counter: 1})
+            invalidate_recipes(*added)
+            invalidate_user(request.user.id)
+        return self._batch_response(ids, present, set(added), 'added')
+
+    def _remove_batch(self, request, ids, model):
+        present = self._batch_presence(request, ids, model)
+        removed = [pk for pk in ids if present.get(pk)]
+        if removed:
+            model.objects.filter(
+                user=request.user,
+                recipe__in=removed,
+            ).delete()
+            invalidate_recipes(*removed)
+            invalidate_user(request.user.id)
+        return self._batch_response(ids, present, set(removed), 'removed')
@@ -1,6 +1,31 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class CursorPaginate(CursorPagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('-pud_date', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'cursor_ordering', self.ordering)
 
 
 class Paginate(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if CursorPaginate.cursor_query_param in request.query_params:
+            self.cursor_paginator = CursorPaginate()
+            return self.cursor_paginator.paginate_queryset(
+                queryset,
+                request,
+                view,
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
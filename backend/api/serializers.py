@@ -1,11 +1,13 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_base64.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
+from api.fields import RecipeImageField
+from api.membership import for_request
 from api.mixins import GetIngredientsMixin, GetIsSubscribedMixin
+from recipes.images import generate_variants, variant_urls
 from recipes.models import (
     FavoriteRecipe,
     Ingredient,
@@ -14,7 +16,9 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
-from users.models import Follow
+from recipes.services import shopping_lists_deferred
+from recipes.tasks import run_in_background
+from users.models import Follow, UserStats
 
 User = get_user_model()
 
@@ -73,12 +77,27 @@ class RecipeSerializer(GetIngredientsMixin, serializers.ModelSerializer):
     tags = TagSerializer(many=True)
     author = CustomUserSerializer()
     ingredients = serializers.SerializerMethodField()
-    is_favorited = serializers.BooleanField(default=False)
-    is_in_shopping_cart = serializers.BooleanField(default=False)
+    is_favorited = serializers.SerializerMethodField()
+    is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        exclude = ('search_vector', 'image_variants_ready')
+
+    def get_is_favorited(self, obj):
+        membership = for_request(self.context.get('request'))
+        return obj.id in membership.favorites
+
+    def get_is_in_shopping_cart(self, obj):
+        membership = for_request(self.context.get('request'))
+        return obj.id in membership.cart
+
+    def get_image_variants(self, obj):
+        request = self.context.get('request')
+        if request is None:
+            return variant_urls(obj)
+        return variant_urls(obj, request.build_absolute_uri)
 
 
 class RecipeIngredientsWriteSerializer(serializers.Serializer):
@@ -92,40 +111,44 @@ class RecipeCreateSerializer(GetIngredientsMixin, serializers.ModelSerializer):
         queryset=Tag.objects.all(),
     )
     ingredients = RecipeIngredientsWriteSerializer(many=True)
-    image = Base64ImageField()
+    image = RecipeImageField()
 
     class Meta:
         model = Recipe
-        fields = '__all__'
-        read_only_fields = ('author',)
+        exclude = ('search_vector', 'image_variants_ready')
+        read_only_fields = ('author', 'favorites_count', 'in_carts_count')
 
     def to_representation(self, instance):
         return RecipeSerializer(
-            instance,
+            Recipe.objects.with_related().get(pk=instance.pk),
             context=self.context,
         ).data
 
     def validate(self, data):
         ingredients = data.get('ingredients')
-        ingredient_list = []
         if not ingredients:
             raise serializers.ValidationError(
                 'Должен быть хотя бы один ингредиент.',
             )
+        existing = set(
+            Ingredient.objects.filter(
+                id__in={item['id'] for item in ingredients},
+            ).values_list('id', flat=True),
+        )
+        seen = set()
+        errors = []
         for item in ingredients:
-            ingredient = get_object_or_404(
-                Ingredient,
-                id=item['id'],
-            )
-            if ingredient in ingredient_list:
-                raise serializers.ValidationError(
-                    'Этот ингредиент уже есть',
-                )
-            if int(item['amount']) < 1:
-                raise serializers.ValidationError(
-                    'Минимум - 1',
-                )
-            ingredient_list.append(ingredient)
+            item_errors = {}
+            if item['id'] not in existing:
+                item_errors['id'] = ['Такого ингредиента нет']
+            elif item['id'] in seen:
+                item_errors['id'] = ['Этот ингредиент уже есть']
+            if item['amount'] < 1:
+                item_errors['amount'] = ['Минимум - 1']
+            seen.add(item['id'])
+            errors.append(item_errors)
+        if any(errors):
+            raise serializers.ValidationError({'ingredients': errors})
         return data
 
     def validate_cooking_time(self, time):
@@ -157,6 +180,7 @@ class RecipeCreateSerializer(GetIngredientsMixin, serializers.ModelSerializer):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         recipe = super().create(validated_data)
+        run_in_background(generate_variants, recipe.pk)
         return self.add_ingredients_and_tags(
             recipe,
             ingredients=ingredients,
@@ -164,15 +188,19 @@ class RecipeCreateSerializer(GetIngredientsMixin, serializers.ModelSerializer):
         )
 
     def update(self, instance, validated_data):
-        instance.ingredients.clear()
-        instance.tags.clear()
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        instance = self.add_ingredients_and_tags(
-            instance,
-            ingredients=ingredients,
-            tags=tags,
-        )
+        with shopping_lists_deferred([instance.pk]):
+            instance.ingredients.clear()
+            instance.tags.clear()
+            instance = self.add_ingredients_and_tags(
+                instance,
+                ingredients=ingredients,
+                tags=tags,
+            )
+        if 'image' in validated_data:
+            instance.image_variants_ready = False
+            run_in_background(generate_variants, instance.pk)
         return super().update(instance, validated_data)
 
 
@@ -192,6 +220,7 @@ class FollowSerializer(GetIsSubscribedMixin, serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
+    followers_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Follow
@@ -204,19 +233,37 @@ class FollowSerializer(GetIsSubscribedMixin, serializers.ModelSerializer):
             'is_subscribed',
             'recipes',
             'recipes_count',
+            'followers_count',
         )
 
+    def _author_stats(self, obj):
+        try:
+            return obj.author.stats
+        except UserStats.DoesNotExist:
+            return None
+
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        queryset = obj.author.recipes.all()
-        if limit:
-            queryset = queryset[: int(limit)]
+        queryset = getattr(obj.author, 'limited_recipes', None)
+        if queryset is None:
+            request = self.context.get('request')
+            limit = request.GET.get('recipes_limit')
+            queryset = obj.author.recipes.all()
+            if limit:
+                queryset = queryset[: int(limit)]
         return RecipeAdditionSerializer(queryset, many=True).data
 
     def get_recipes_count(self, obj):
+        stats = self._author_stats(obj)
+        if stats is not None:
+            return stats.recipes_count
         return obj.author.recipes.all().count()
 
+    def get_followers_count(self, obj):
+        stats = self._author_stats(obj)
+        if stats is not None:
+            return stats.followers_count
+        return obj.author.following.count()
+
 
 class FollowCheckSerializer(serializers.ModelSerializer):
     class Meta:
@@ -303,3 +350,14 @@ class ShoppingListCheckingSerializer(serializers.ModelSerializer):
                 'Ингредиентов из этого рецепта уже нет в корзине',
             )
         return obj
+
+
+class RecipeBatchSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.RECIPE_BATCH_MAX_SIZE,
+    )
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
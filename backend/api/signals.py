@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_token
+from api.cache import (
+    invalidate_recipe,
+    invalidate_recipes,
+    invalidate_shared,
+    invalidate_users,
+)
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import Follow
+
+User = get_user_model()
+
+DISPLAYED_FIELDS = ('username', 'first_name', 'last_name', 'email')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    invalidate_recipe(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    invalidate_recipe(instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_relations_changed(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        invalidate_shared()
+    else:
+        invalidate_recipe(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def reference_data_changed(sender, **kwargs):
+    invalidate_shared()
+
+
+@receiver(pre_save, sender=User)
+def remember_displayed_fields(sender, instance, update_fields=None, **kwargs):
+    instance._displayed_fields = None
+    if instance.pk is None:
+        return
+    if update_fields and not set(update_fields) & set(DISPLAYED_FIELDS):
+        return
+    instance._displayed_fields = (
+        User.objects.filter(pk=instance.pk)
+        .values_list(*DISPLAYED_FIELDS)
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+def user_changed(
+    sender,
+    instance,
+    created=False,
+    update_fields=None,
+    **kwargs,
+):
+    if created or update_fields and set(update_fields) <= {'last_login'}:
+        return
+    previous = getattr(instance, '_displayed_fields', None)
+    current = tuple(getattr(instance, field) for field in DISPLAYED_FIELDS)
+    if previous is not None and previous != current:
+        recipe_ids = list(instance.recipes.values_list('pk', flat=True))
+        if recipe_ids:
+            invalidate_recipes(*recipe_ids)
+        invalidate_users(
+            instance.pk,
+            *Follow.objects.filter(author=instance).values_list(
+                'user',
+                flat=True,
+            ),
+        )
+    for key in Token.objects.filter(user=instance).values_list(
+        'key',
+        flat=True,
+    ):
+        invalidate_token(key)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
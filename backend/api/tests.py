@@ -0,0 +1,145 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Follow
+
+User = get_user_model()
+
+
+class RecipeListQueriesTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader',
+            email='reader@example.com',
+            password='password',
+        )
+        authors = [
+            User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com',
+                password='password',
+            )
+            for number in range(3)
+        ]
+        tags = [
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in (
+                ('Завтрак', '#E26C2D', 'breakfast'),
+                ('Обед', '#49B64E', 'lunch'),
+            )
+        ]
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(5)
+        )
+        ingredients = list(Ingredient.objects.all())
+        for number in range(30):
+            recipe = Recipe.objects.create(
+                author=authors[number % len(authors)],
+                name=f'Рецепт {number}',
+                text='Описание',
+                cooking_time=10,
+            )
+            recipe.tags.set(tags)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=ingredient,
+                    amount=1,
+                )
+                for ingredient in ingredients[:3]
+            )
+            if number % 2:
+                FavoriteRecipe.objects.create(user=cls.user, recipe=recipe)
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Follow.objects.create(user=cls.user, author=authors[0])
+
+    def assert_constant_queries(self, queries):
+        for limit in (6, 30):
+            cache.clear()
+            with self.assertNumQueries(queries):
+                response = self.client.get('/api/recipes/', {'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), limit)
+
+    def test_anonymous_list_queries_do_not_depend_on_page_size(self):
+        self.assert_constant_queries(4)
+
+    def test_authenticated_list_queries_do_not_depend_on_page_size(self):
+        self.client.force_authenticate(self.user)
+        self.assert_constant_queries(7)
+
+
+class ShoppingCartDownloadTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='buyer',
+            email='buyer@example.com',
+            password='password',
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_empty_format_falls_back_to_txt(self):
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/',
+            {'format': ''},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Type'],
+            'text/plain; charset=utf-8',
+        )
+
+
+class RecipeTagsFilterTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password',
+        )
+        breakfast = Tag.objects.create(
+            name='Завтрак',
+            color='#E26C2D',
+            slug='breakfast',
+        )
+        Tag.objects.create(name='Обед', color='#49B64E', slug='lunch')
+        for number in range(2):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {number}',
+                text='Описание',
+                cooking_time=10,
+            )
+            if number:
+                recipe.tags.add(breakfast)
+
+    def test_known_tags_filter_recipes(self):
+        response = self.client.get(
+            '/api/recipes/',
+            {'tags': ['breakfast', 'lunch']},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+
+    def test_unknown_tag_is_rejected(self):
+        response = self.client.get(
+            '/api/recipes/',
+            {'tags': ['breakfast', 'brunch']},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tags', response.data)
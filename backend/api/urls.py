@@ -1,7 +1,13 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import FollowViewSet, IngredientViewSet, RecipeViewSet, TagViewSet
+from .views import (
+    FollowViewSet,
+    IngredientViewSet,
+    RecipeViewSet,
+    TagViewSet,
+    metrics_view,
+)
 
 app_name = 'api'
 
@@ -12,6 +18,7 @@ router.register('tags', TagViewSet)
 router.register('ingredients', IngredientViewSet)
 
 urlpatterns = [
+    path('metrics/', metrics_view, name='metrics'),
     path('', include(router.urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
@@ -1,40 +1,63 @@
 from http import HTTPStatus
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import BooleanField, Exists, OuterRef, Sum, Value
-from django.http import HttpResponse
+from django.db.models import (
+    BooleanField,
+    Prefetch,
+    Value,
+    prefetch_related_objects,
+)
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
 from djoser.views import UserViewSet
 from rest_framework import mixins, viewsets
-from rest_framework.decorators import action
-from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.decorators import (
+    action,
+    api_view,
+    permission_classes,
+    renderer_classes,
+)
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import (
+    SAFE_METHODS,
+    IsAdminUser,
+    IsAuthenticated,
+)
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-from api.filters import IngredientSearchFilter, RecipeFilter
+from api import cache, metrics
+from api.decorators import conditional_get
+from api.exports import EXPORTS, shopping_list_response
+from api.filters import RecipeFilter
 from api.mixins import AddRemoveMethod
 from api.paginations import Paginate
 from api.permissions import IsAdminAuthorOrReadOnly, IsAdminOrReadOnly
+from api.renderers import CSVRenderer, PlainTextRenderer
 from api.serializers import (
     FavoriteCheckingSerializer,
     FollowCheckSerializer,
     FollowSerializer,
     IngredientSerializer,
     RecipeAdditionSerializer,
+    RecipeBatchSerializer,
     RecipeCreateSerializer,
     RecipeSerializer,
     ShoppingListCheckingSerializer,
     TagSerializer,
 )
+from foodgram.db_router import primary
+from recipes import autocomplete, pantry, timeline
 from recipes.models import (
     FavoriteRecipe,
     Ingredient,
     Recipe,
-    RecipeIngredient,
     ShoppingCart,
     Tag,
 )
+from recipes.services import refresh_for_recipes, shopping_list_rows
 from users.models import Follow
 
 User = get_user_model()
@@ -47,13 +70,33 @@ class ListRetrieveViewSet(
 ):
     permission_classes = (IsAdminOrReadOnly,)
 
+    def get_version_keys(self, request, *args, **kwargs):
+        return [cache.SHARED_VERSION_KEY]
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class IngredientViewSet(ListRetrieveViewSet):
     pagination_class = None
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (IngredientSearchFilter,)
-    search_fields = ('^name',)
+
+    def get_version_keys(self, request, *args, **kwargs):
+        return [cache.SHARED_VERSION_KEY, cache.RECIPES_VERSION_KEY]
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        ingredients = autocomplete.get_index().search(
+            request.query_params.get('name', ''),
+        )
+        serializer = self.get_serializer(ingredients, many=True)
+        return Response(serializer.data)
 
 
 class TagViewSet(ListRetrieveViewSet):
@@ -72,36 +115,180 @@ class RecipeViewSet(AddRemoveMethod):
             return RecipeSerializer
         return RecipeCreateSerializer
 
-    def get_queryset(self):
-        if self.request.user.is_authenticated:
-            return Recipe.objects.annotate(
-                is_favorited=Exists(
-                    FavoriteRecipe.objects.filter(
-                        user=self.request.user,
-                        recipe__pk=OuterRef('pk'),
-                    ),
-                ),
-                is_in_shopping_cart=Exists(
-                    ShoppingCart.objects.filter(
-                        user=self.request.user,
-                        recipe__pk=OuterRef('pk'),
-                    ),
-                ),
+    def _cached_response(self, key, handler, request, *args, **kwargs):
+        data = cache.get_cached(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        with primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == HTTPStatus.OK:
+            cache.set_cached(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def get_version_keys(self, request, *args, **kwargs):
+        if 'pk' in kwargs:
+            keys = [cache.recipe_version_key(kwargs['pk'])]
+        else:
+            keys = [cache.RECIPES_VERSION_KEY]
+        keys.append(cache.SHARED_VERSION_KEY)
+        if request.user.is_authenticated:
+            keys.append(cache.user_version_key(request.user.pk))
+        return keys
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        return self._cached_response(
+            cache.list_cache_key(request),
+            super().list,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().retrieve(request, *args, **kwargs)
+        return self._cached_response(
+            cache.detail_cache_key(request, kwargs['pk']),
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        position = None
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            position = timeline.decode_cursor(cursor)
+            if position is None:
+                raise NotFound('Неверный курсор.')
+        limit = self.paginator.get_page_size(request)
+        rows = timeline.page(request.user, position, limit)
+        ids = [recipe_id for _, recipe_id in rows[:limit]]
+        recipes = self.get_queryset().in_bulk(ids)
+        next_url = None
+        if len(rows) > limit:
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                'cursor',
+                timeline.encode_cursor(*rows[limit - 1]),
             )
-        return Recipe.objects.annotate(
-            is_favorited=Value(False, output_field=BooleanField()),
-            is_in_shopping_cart=Value(False, output_field=BooleanField()),
+        serializer = RecipeSerializer(
+            [recipes[pk] for pk in ids if pk in recipes],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return Response(
+            {'next': next_url, 'previous': None, 'results': serializer.data},
+        )
+
+    @action(detail=False)
+    def trending(self, request):
+        queryset = self.get_queryset().filter(
+            trending__isnull=False,
+        ).order_by('-trending__score', '-id')
+        page = self.paginate_queryset(queryset)
+        serializer = RecipeSerializer(
+            page,
+            many=True,
+            context=self.get_serializer_context(),
         )
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False)
+    def pantry(self, request):
+        try:
+            ingredient_ids = {
+                int(value)
+                for param in request.query_params.getlist('ingredients')
+                for value in param.split(',')
+                if value.strip()
+            }
+        except ValueError:
+            raise ValidationError(
+                {'ingredients': 'Укажите id ингредиентов через запятую.'},
+            )
+        if not ingredient_ids:
+            raise ValidationError(
+                {'ingredients': 'Укажите хотя бы один ингредиент.'},
+            )
+        matches = pantry.get_index().match(
+            ingredient_ids,
+            self.paginator.get_page_size(request),
+        )
+        recipes = Recipe.objects.in_bulk(
+            [match['recipe'] for match in matches],
+        )
+        ingredients = Ingredient.objects.in_bulk(
+            {pk for match in matches for pk in match['missing']},
+        )
+        results = []
+        for match in matches:
+            recipe = recipes.get(match['recipe'])
+            if recipe is None:
+                continue
+            results.append(
+                {
+                    **RecipeAdditionSerializer(
+                        recipe,
+                        context=self.get_serializer_context(),
+                    ).data,
+                    'coverage': match['coverage'],
+                    'matched': match['matched'],
+                    'missing': IngredientSerializer(
+                        [
+                            ingredients[pk]
+                            for pk in match['missing']
+                            if pk in ingredients
+                        ],
+                        many=True,
+                    ).data,
+                },
+            )
+        return Response({'results': results})
+
+    @action(detail=True)
+    def similar(self, request, pk):
+        recipe = get_object_or_404(Recipe, pk=pk)
+        similar = recipe.similar_recipes.select_related('similar')[
+            :settings.SIMILAR_RECIPES_TOP_K
+        ]
+        serializer = RecipeAdditionSerializer(
+            [item.similar for item in similar],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        return Response(cache.cache_stats())
+
+    def get_queryset(self):
+        return Recipe.objects.with_related()
 
     @transaction.atomic()
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @transaction.atomic()
+    def perform_update(self, serializer):
+        serializer.save()
+
     @action(
         detail=True,
         methods=['post'],
         permission_classes=[IsAuthenticated],
     )
+    @transaction.atomic()
     def favorite(self, request, pk):
         return self._add_method(
             request=request,
@@ -110,6 +297,7 @@ class RecipeViewSet(AddRemoveMethod):
         )
 
     @favorite.mapping.delete
+    @transaction.atomic()
     def del_favorite(self, request, pk):
         return self._remove_method(
             request=request,
@@ -122,6 +310,7 @@ class RecipeViewSet(AddRemoveMethod):
         methods=['post'],
         permission_classes=[IsAuthenticated],
     )
+    @transaction.atomic()
     def shopping_cart(self, request, pk):
         return self._add_method(
             request=request,
@@ -130,8 +319,69 @@ class RecipeViewSet(AddRemoveMethod):
         )
 
     @shopping_cart.mapping.delete
+    @transaction.atomic()
     def remove_shopping_cart(self, request, pk):
-        return self._remove_method(request=request, pk=pk, model=ShoppingCart)
+        return self._remove_method(
+            request=request,
+            pk=pk,
+            model=ShoppingCart,
+        )
+
+    def _batch_ids(self, request):
+        serializer = RecipeBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['recipes']
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='favorite',
+        permission_classes=[IsAuthenticated],
+    )
+    @transaction.atomic()
+    def favorite_batch(self, request):
+        return self._add_batch(
+            request=request,
+            ids=self._batch_ids(request),
+            model=FavoriteRecipe,
+            counter='favorites_count',
+        )
+
+    @favorite_batch.mapping.delete
+    @transaction.atomic()
+    def del_favorite_batch(self, request):
+        return self._remove_batch(
+            request=request,
+            ids=self._batch_ids(request),
+            model=FavoriteRecipe,
+        )
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='shopping_cart',
+        permission_classes=[IsAuthenticated],
+    )
+    @transaction.atomic()
+    def shopping_cart_batch(self, request):
+        ids = self._batch_ids(request)
+        response = self._add_batch(
+            request=request,
+            ids=ids,
+            model=ShoppingCart,
+            counter='in_carts_count',
+        )
+        refresh_for_recipes(ids, user_ids=[request.user.id])
+        return response
+
+    @shopping_cart_batch.mapping.delete
+    @transaction.atomic()
+    def remove_shopping_cart_batch(self, request):
+        return self._remove_batch(
+            request=request,
+            ids=self._batch_ids(request),
+            model=ShoppingCart,
+        )
 
     @transaction.atomic()
     def add_object(self, model, user, pk):
@@ -149,39 +399,31 @@ class RecipeViewSet(AddRemoveMethod):
         methods=['get'],
         detail=False,
         permission_classes=[IsAuthenticated],
+        renderer_classes=[JSONRenderer, PlainTextRenderer, CSVRenderer],
     )
     def download_shopping_cart(self, request):
-        ingredients = (
-            RecipeIngredient.objects.filter(
-                recipe__cart__user=request.user,
-            )
-            .values(
-                'ingredient__name',
-                'ingredient__measurement_unit',
-            )
-            .annotate(quantity=Sum('amount'))
-        )
-        today = timezone.now()
-        shopping = (
-            f'Список покупок {request.user.username}\n'
-            f'Дата: {today:%Y-%m-%d}\n\n'
-        )
-        shopping += '\n'.join(
-            [
-                f'- {ingredient["ingredient__name"]} '
-                f'({ingredient["ingredient__measurement_unit"]})'
-                f' - {ingredient["quantity"]}'
-                for ingredient in ingredients
-            ],
-        )
-        filename = f'{request.user.username}_shopping.txt'
-        response = HttpResponse(shopping, content_type='text/plain')
-        response['Content-Disposition'] = f'attachment; filename={filename}'
-        return response
+        export_format = request.query_params.get('format') or 'txt'
+        if export_format not in EXPORTS:
+            raise ValidationError({'format': 'Неизвестный формат выгрузки.'})
+        ingredients = shopping_list_rows(request.user)
+        return shopping_list_response(
+            request,
+            ingredients.iterator(chunk_size=2000),
+            export_format,
+        )
 
 
 class FollowViewSet(UserViewSet):
     pagination_class = Paginate
+    cursor_ordering = ('id',)
+
+    def get_version_keys(self, request, *args, **kwargs):
+        return [cache.user_version_key(request.user.pk)]
+
+    @action(['get', 'put', 'patch', 'delete'], detail=False)
+    @conditional_get
+    def me(self, request, *args, **kwargs):
+        return super().me(request, *args, **kwargs)
 
     @action(
         methods=['post'],
@@ -202,6 +444,8 @@ class FollowViewSet(UserViewSet):
         )
         serializer.is_valid(raise_exception=True)
         result = Follow.objects.create(user=user, author=author)
+        result.is_subscribed = True
+        cache.invalidate_user(user.id)
         serializer = FollowSerializer(result, context={'request': request})
         return Response(serializer.data, status=HTTPStatus.CREATED)
 
@@ -220,16 +464,52 @@ class FollowViewSet(UserViewSet):
         )
         serializer.is_valid(raise_exception=True)
         user.follower.filter(author=author).delete()
+        cache.invalidate_user(user.id)
         return Response(status=HTTPStatus.NO_CONTENT)
 
+    def get_author_recipes(self, author_ids):
+        limit = self.request.query_params.get('recipes_limit', '')
+        queryset = Recipe.objects.filter(author__in=author_ids)
+        if limit.isdigit():
+            queryset = queryset.limited_per_author(int(limit))
+        return queryset
+
+    def _prefetch_recipes(self, follows):
+        queryset = self.get_author_recipes(
+            [follow.author_id for follow in follows],
+        )
+        prefetch_related_objects(
+            follows,
+            Prefetch(
+                'author__recipes',
+                queryset=queryset,
+                to_attr='limited_recipes',
+            ),
+        )
+
+    def get_subscriptions(self, user):
+        return user.follower.select_related(
+            'author',
+            'author__stats',
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField()),
+        )
+
     @action(detail=False, permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
-        user = request.user
-        queryset = user.follower.all()
+        queryset = self.get_subscriptions(request.user)
         pages = self.paginate_queryset(queryset)
+        self._prefetch_recipes(pages)
         serializer = FollowSerializer(
             pages,
             many=True,
             context={'request': request},
         )
         return self.get_paginated_response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+@renderer_classes([PlainTextRenderer])
+def metrics_view(request):
+    return Response(metrics.render())
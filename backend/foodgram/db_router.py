@@ -0,0 +1,85 @@
+import hashlib
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.cache import cache
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_APPS = {'authtoken'}
+
+_state = threading.local()
+
+
+def replicas():
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+def sticky_cache_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    digest = hashlib.sha256(authorization.encode()).hexdigest()
+    return f'db:sticky:{digest}'
+
+
+@contextmanager
+def primary():
+    replica = getattr(_state, 'replica', None)
+    _state.replica = None
+    try:
+        yield
+    finally:
+        _state.replica = replica
+
+
+def primary_if_changed(versions):
+    window = settings.DB_PRIMARY_STICKY_SECONDS * 10 ** 9
+    if max(versions) > time.time_ns() - window:
+        return primary()
+    return nullcontext()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = getattr(_state, 'replica', None)
+        if replica is None or model._meta.app_label in PRIMARY_APPS:
+            return PRIMARY
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = sticky_cache_key(request)
+        safe = request.method in SAFE_METHODS
+        aliases = replicas()
+        _state.replica = None
+        if (
+            safe
+            and aliases
+            and request.path.startswith('/api/')
+            and (key is None or not cache.get(key))
+        ):
+            _state.replica = random.choice(aliases)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.replica = None
+        if not safe and key is not None and response.status_code < 400:
+            cache.set(key, True, settings.DB_PRIMARY_STICKY_SECONDS)
+        return response
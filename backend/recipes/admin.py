@@ -2,10 +2,13 @@ from django.contrib import admin
 
 from recipes.models import (
     FavoriteRecipe,
+    FeedEntry,
     Ingredient,
     Recipe,
     RecipeIngredient,
     ShoppingCart,
+    ShoppingListItem,
+    SimilarRecipe,
     Tag,
 )
 
@@ -15,6 +18,12 @@ class FavoriteRecipeAdmin(admin.ModelAdmin):
     pass
 
 
+@admin.register(FeedEntry)
+class FeedEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'recipe', 'author', 'pud_date')
+    list_filter = ('user',)
+
+
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
@@ -33,7 +42,7 @@ class RecipeAdmin(admin.ModelAdmin):
     readonly_fields = ('count_favorites',)
 
     def count_favorites(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
 
 @admin.register(ShoppingCart)
@@ -41,6 +50,17 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     pass
 
 
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'ingredient', 'amount')
+    list_filter = ('user',)
+
+
+@admin.register(SimilarRecipe)
+class SimilarRecipeAdmin(admin.ModelAdmin):
+    list_display = ('recipe', 'similar', 'score')
+
+
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug', 'color')
@@ -0,0 +1,130 @@
+import bisect
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from foodgram.db_router import primary
+from recipes.models import Ingredient
+
+VERSION_KEY = 'ingredient_index_version'
+NGRAM_SIZE = 3
+FUZZY_THRESHOLD = 0.3
+FUZZY_LIMIT = 20
+
+
+def ngrams(text):
+    padded = f' {text} '
+    return {
+        padded[i:i + NGRAM_SIZE]
+        for i in range(len(padded) - NGRAM_SIZE + 1)
+    }
+
+
+class IngredientIndex:
+    def __init__(self, rows):
+        self.items = {}
+        self.usage = {}
+        self.keys = []
+        self.gram_counts = {}
+        self.grams = defaultdict(list)
+        for row in rows:
+            pk = row['id']
+            name = row['name'].lower()
+            self.items[pk] = {
+                'id': pk,
+                'name': row['name'],
+                'measurement_unit': row['measurement_unit'],
+            }
+            self.usage[pk] = row['usage']
+            self.keys.append((name, pk))
+            item_grams = ngrams(name)
+            self.gram_counts[pk] = len(item_grams)
+            for gram in item_grams:
+                self.grams[gram].append(pk)
+        self.keys.sort()
+        self.built_at = time.monotonic()
+
+    def _rank(self, pk):
+        return -self.usage[pk], self.items[pk]['name']
+
+    def prefix(self, query):
+        start = bisect.bisect_left(self.keys, (query,))
+        matches = []
+        for name, pk in self.keys[start:]:
+            if not name.startswith(query):
+                break
+            matches.append(pk)
+        return sorted(matches, key=self._rank)
+
+    def fuzzy(self, query):
+        query_grams = ngrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.grams.get(gram, ()))
+        scored = []
+        for pk, count in shared.items():
+            similarity = count / (
+                len(query_grams) + self.gram_counts[pk] - count
+            )
+            if similarity >= FUZZY_THRESHOLD:
+                scored.append((-similarity, self._rank(pk), pk))
+        scored.sort()
+        return [pk for *_, pk in scored[:FUZZY_LIMIT]]
+
+    def search(self, query):
+        query = query.strip().lower()
+        if not query:
+            return [self.items[pk] for _, pk in self.keys]
+        ids = self.prefix(query) or self.fuzzy(query)
+        return [self.items[pk] for pk in ids]
+
+
+_lock = threading.Lock()
+_state = {'index': None, 'version': None}
+
+
+def build_index():
+    return IngredientIndex(
+        Ingredient.objects.annotate(
+            usage=Count('quantity_ingredients'),
+        ).values('id', 'name', 'measurement_unit', 'usage'),
+    )
+
+
+def _is_fresh(index, version):
+    return (
+        index is not None
+        and _state['version'] == version
+        and time.monotonic() - index.built_at < settings.INGREDIENT_INDEX_TTL
+    )
+
+
+def get_index():
+    version = cache.get(VERSION_KEY, 0)
+    index = _state['index']
+    if _is_fresh(index, version):
+        return index
+    with _lock:
+        index = _state['index']
+        if not _is_fresh(index, version):
+            with primary():
+                index = build_index()
+            _state.update(index=index, version=version)
+    return index
+
+
+def _bump():
+    _state['index'] = None
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def invalidate():
+    transaction.on_commit(_bump)
@@ -0,0 +1,94 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from recipes.models import Recipe
+
+VARIANTS = {
+    'thumbnail': 320,
+    'medium': 800,
+    'large': 1600,
+}
+FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+QUALITY = 82
+
+
+def variant_name(name, size, extension):
+    directory, filename = os.path.split(name)
+    stem, _ = os.path.splitext(filename)
+    return os.path.join(directory, 'variants', f'{stem}_{size}.{extension}')
+
+
+def variant_urls(recipe, absolute=str):
+    if not recipe.image:
+        return None
+    if not recipe.image_variants_ready:
+        original = absolute(recipe.image.url)
+        variants = {
+            size: {extension: original for extension in FORMATS}
+            for size in VARIANTS
+        }
+        variants['srcset'] = {extension: original for extension in FORMATS}
+        return variants
+    variants = {
+        size: {
+            extension: absolute(
+                default_storage.url(
+                    variant_name(recipe.image.name, size, extension),
+                ),
+            )
+            for extension in FORMATS
+        }
+        for size in VARIANTS
+    }
+    variants['srcset'] = {
+        extension: ', '.join(
+            f'{variants[size][extension]} {width}w'
+            for size, width in VARIANTS.items()
+        )
+        for extension in FORMATS
+    }
+    return variants
+
+
+def _encode(image, image_format):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, quality=QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def generate_variants(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return
+    name = recipe.image.name
+    with default_storage.open(name) as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original = original.convert('RGB')
+    for size, width in VARIANTS.items():
+        image = original.copy()
+        image.thumbnail((width, width), Image.Resampling.LANCZOS)
+        for extension, image_format in FORMATS.items():
+            path = variant_name(name, size, extension)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            default_storage.save(
+                path,
+                ContentFile(_encode(image, image_format)),
+            )
+    with transaction.atomic():
+        recipe = (
+            Recipe.objects.select_for_update()
+            .filter(pk=recipe_id, image=name)
+            .first()
+        )
+        if recipe is not None:
+            recipe.image_variants_ready = True
+            recipe.save(update_fields=['image_variants_ready'])
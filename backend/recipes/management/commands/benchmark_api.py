@@ -0,0 +1,139 @@
+import json
+import statistics
+import time
+from contextlib import ExitStack
+from tempfile import TemporaryDirectory
+
+from django.core.management import BaseCommand
+from django.db import connections, transaction
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.metrics import QueryTimer
+from recipes.models import Ingredient, Tag
+from recipes.services import sample_user
+
+IMAGE = (
+    'data:image/gif;base64,'
+    'R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'
+)
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = 'Замер задержек и числа запросов на основных эндпоинтах API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--user', help='Имя пользователя для запросов.')
+        parser.add_argument('--output', help='Файл для сохранения JSON.')
+
+    def handle(self, *args, **options):
+        user = sample_user(options['user'])
+        if user is None:
+            print('Нет пользователей для теста.')
+            return
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        anonymous = APIClient()
+        tags = list(Tag.objects.values_list('slug', flat=True)[:2])
+        ingredients = list(Ingredient.objects.values('pk', 'name')[:10])
+        prefix = ingredients[0]['name'][:2] if ingredients else ''
+        scenarios = {
+            'recipes_list_anonymous': (
+                anonymous.get,
+                '/api/recipes/',
+                {'tags': tags},
+            ),
+            'recipes_list_tags': (client.get, '/api/recipes/', {'tags': tags}),
+            'recipes_list_favorited': (
+                client.get,
+                '/api/recipes/',
+                {'is_favorited': 1},
+            ),
+            'subscriptions': (
+                client.get,
+                '/api/users/subscriptions/',
+                {'recipes_limit': 3},
+            ),
+            'ingredients_search': (
+                client.get,
+                '/api/ingredients/',
+                {'name': prefix},
+            ),
+            'download_shopping_cart': (
+                client.get,
+                '/api/recipes/download_shopping_cart/',
+                None,
+            ),
+        }
+        results = {
+            name: self.measure(method, url, data, options['repeat'])
+            for name, (method, url, data) in scenarios.items()
+        }
+        if ingredients and tags:
+            body = {
+                'name': 'Тестовый рецепт',
+                'text': 'Рецепт для замера',
+                'cooking_time': 10,
+                'image': IMAGE,
+                'tags': list(
+                    Tag.objects.filter(slug__in=tags).values_list(
+                        'pk',
+                        flat=True,
+                    ),
+                ),
+                'ingredients': [
+                    {'id': item['pk'], 'amount': 10} for item in ingredients
+                ],
+            }
+            with TemporaryDirectory() as media_root:
+                with override_settings(MEDIA_ROOT=media_root):
+                    results['recipe_create'] = self.measure(
+                        client.post,
+                        '/api/recipes/',
+                        body,
+                        options['repeat'],
+                        rollback=True,
+                    )
+        report = json.dumps(
+            {'user': user.username, 'results': results},
+            ensure_ascii=False,
+            indent=2,
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report)
+        print(report)
+
+    def measure(self, method, url, data, repeat, rollback=False):
+        timings = []
+        queries = []
+        statuses = set()
+        for _ in range(repeat):
+            timer = QueryTimer()
+            with ExitStack() as stack:
+                if rollback:
+                    stack.enter_context(transaction.atomic())
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                start = time.perf_counter()
+                response = method(url, data, format='json')
+                timings.append((time.perf_counter() - start) * 1000)
+                if rollback:
+                    transaction.set_rollback(True)
+            queries.append(timer.queries)
+            statuses.add(response.status_code)
+        timings.sort()
+        return {
+            'status': sorted(statuses),
+            'p50_ms': round(percentile(timings, 0.5), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries': max(queries),
+        }
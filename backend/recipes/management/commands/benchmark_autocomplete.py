@@ -0,0 +1,66 @@
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand
+
+from recipes import autocomplete
+from recipes.models import Ingredient
+
+
+def measure(search, queries, repeat):
+    timings = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'mean': statistics.mean(timings),
+        'p50': timings[len(timings) // 2],
+        'p95': timings[int(len(timings) * 0.95)],
+    }
+
+
+def sql_search(query):
+    return list(
+        Ingredient.objects.filter(name__istartswith=query).values(
+            'id',
+            'name',
+            'measurement_unit',
+        ),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Сравнение поиска ингредиентов: индекс в памяти против SQL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            print('Нет ингредиентов для теста.')
+            return
+        rng = random.Random(options['seed'])
+        queries = [
+            rng.choice(names)[: rng.randint(1, 4)]
+            for _ in range(options['queries'])
+        ]
+        start = time.perf_counter()
+        index = autocomplete.build_index()
+        build_time = (time.perf_counter() - start) * 1000
+        results = {
+            'sql': measure(sql_search, queries, options['repeat']),
+            'index': measure(index.search, queries, options['repeat']),
+        }
+        print(f'Построение индекса: {build_time:.1f} мс')
+        for name, result in results.items():
+            print(
+                f'{name}: среднее {result["mean"]:.3f} мс, '
+                f'p50 {result["p50"]:.3f} мс, p95 {result["p95"]:.3f} мс',
+            )
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management import BaseCommand
+
+from recipes import similarity
+
+
+class Command(BaseCommand):
+    help = 'Пересчет индекса похожих рецептов.'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stored = similarity.build_all()
+        print(
+            f'Сохранено пар похожих рецептов: {stored} '
+            f'за {time.perf_counter() - start:.1f} с.',
+        )
@@ -0,0 +1,17 @@
+from django.core.management import BaseCommand
+
+from api.cache import invalidate_recipes
+from recipes import trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчет популярности рецептов по свежим добавлениям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        scores = trending.compute_scores()
+        trending.store_scores(scores, options['batch_size'])
+        invalidate_recipes()
+        print(f'Рассчитана популярность рецептов: {len(scores)}.')
@@ -0,0 +1,146 @@
+import re
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.views import FollowViewSet, RecipeViewSet
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.services import (
+    sample_user,
+    shopping_list_aggregation,
+    shopping_list_rows,
+)
+
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)(.*)$')
+EXECUTION_TIME = re.compile(r'Execution Time: ([\d.]+) ms')
+
+
+def make_view(viewset, user, action, params=None):
+    request = Request(APIRequestFactory().get('/', params or {}))
+    request.user = user
+    return viewset(request=request, action=action, format_kwarg=None)
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN для запросов горячих эндпоинтов с поиском seq scan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Имя пользователя для запросов.')
+        parser.add_argument(
+            '--slow-ms',
+            type=float,
+            default=50,
+            help='Порог медленного плана в миллисекундах.',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Не считать проблемой seq scan по меньшим таблицам.',
+        )
+        parser.add_argument('--show-plans', action='store_true')
+        parser.add_argument(
+            '--fail-on-issues',
+            action='store_true',
+            help='Завершиться с ошибкой, если найдены проблемы.',
+        )
+
+    def handle(self, *args, **options):
+        user = sample_user(options['user'])
+        if user is None:
+            raise CommandError('Нет пользователей для проверки.')
+        self.tables = set(connection.introspection.table_names())
+        issues = 0
+        for name, queryset in self.querysets(user):
+            plan, elapsed = self.explain(queryset)
+            problems = [
+                f'seq scan по {table}'
+                for table in self.scanned_tables(plan)
+                if table in self.tables
+                and self.table_rows(table) >= options['min_rows']
+            ]
+            if elapsed >= options['slow_ms']:
+                problems.append(f'медленный план ({elapsed:.1f} мс)')
+            issues += bool(problems)
+            status = '; '.join(problems) or 'ok'
+            print(f'{name}: {elapsed:.1f} мс, {status}')
+            if options['show_plans']:
+                print(plan)
+        if issues and options['fail_on_issues']:
+            raise CommandError(f'Проблемных запросов: {issues}.')
+
+    def querysets(self, user):
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        tags = list(Tag.objects.values_list('slug', flat=True)[:2])
+        author = Recipe.objects.values_list('author', flat=True).first()
+        word = Recipe.objects.values_list('name', flat=True).first() or ''
+        prefix = (
+            Ingredient.objects.values_list('name', flat=True).first() or ''
+        )[:2]
+        filters = {
+            'recipes_list': {},
+            'recipes_tags': {'tags': tags},
+            'recipes_author': {'author': author},
+            'recipes_favorited': {'is_favorited': 1},
+            'recipes_in_shopping_cart': {'is_in_shopping_cart': 1},
+            'recipes_search': {'search': word.split(' ')[-1]},
+            'recipes_tags_favorited': {'tags': tags, 'is_favorited': 1},
+        }
+        for name, params in filters.items():
+            view = make_view(RecipeViewSet, user, 'list', params)
+            yield name, view.filter_queryset(view.get_queryset())[:page_size]
+        yield 'shopping_cart_download', shopping_list_rows(user)
+        yield 'shopping_cart_aggregation', shopping_list_aggregation([user])
+        view = make_view(
+            FollowViewSet,
+            user,
+            'subscriptions',
+            {'recipes_limit': 3},
+        )
+        subscriptions = view.get_subscriptions(user)[:page_size]
+        yield 'subscriptions', subscriptions
+        yield 'subscriptions_recipes', view.get_author_recipes(
+            [follow.author_id for follow in subscriptions],
+        )
+        yield 'ingredient_prefix', Ingredient.objects.filter(
+            name__istartswith=prefix,
+        )
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            plan = queryset.explain(analyze=True, buffers=True)
+            match = EXECUTION_TIME.search(plan)
+            return plan, float(match.group(1)) if match else 0.0
+        plan = queryset.explain()
+        start = time.perf_counter()
+        list(queryset)
+        return plan, (time.perf_counter() - start) * 1000
+
+    def scanned_tables(self, plan):
+        if connection.vendor == 'postgresql':
+            return set(POSTGRES_SCAN.findall(plan))
+        tables = set()
+        for line in plan.splitlines():
+            match = SQLITE_SCAN.search(line)
+            if match and 'INDEX' not in match.group(2):
+                tables.add(match.group(1))
+        return tables
+
+    def table_rows(self, table):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [table],
+                )
+            else:
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}',
+                )
+            row = cursor.fetchone()
+        return row[0] if row else 0
@@ -0,0 +1,232 @@
+import itertools
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, call_command
+from django.db.models import Max
+
+from api.cache import invalidate_recipes, invalidate_shared
+from recipes import autocomplete
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Follow, UserStats
+
+User = get_user_model()
+
+WORDS = (
+    'суп', 'салат', 'пирог', 'рагу', 'каша', 'запеканка', 'омлет', 'паста',
+    'котлеты', 'плов', 'борщ', 'блины', 'сырники', 'жаркое', 'соус',
+)
+ADJECTIVES = (
+    'домашний', 'быстрый', 'летний', 'острый', 'сытный', 'легкий',
+    'праздничный', 'овощной', 'мясной', 'сливочный', 'пряный',
+)
+
+
+def power_weights(count, exponent, rng):
+    weights = [1 / (rank + 1) ** exponent for rank in range(count)]
+    rng.shuffle(weights)
+    return list(itertools.accumulate(weights))
+
+
+def bulk_create_chunked(model, objs, batch_size):
+    objs = iter(objs)
+    created = 0
+    while True:
+        chunk = list(itertools.islice(objs, batch_size))
+        if not chunk:
+            return created
+        model.objects.bulk_create(chunk, ignore_conflicts=True)
+        created += len(chunk)
+
+
+def pick_distinct(rng, population, cum_weights, count):
+    count = min(count, len(population))
+    picked = set()
+    while len(picked) < count:
+        picked.update(
+            rng.choices(population, cum_weights=cum_weights, k=count),
+        )
+    return list(picked)[:count]
+
+
+def new_ids(model, last_id, fields='pk'):
+    return list(
+        model.objects.filter(pk__gt=last_id or 0)
+        .order_by('pk')
+        .values_list(fields, flat=True),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Генерация тестовых пользователей, рецептов, подписок и корзин.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=20)
+        parser.add_argument('--favorites', type=int, default=30)
+        parser.add_argument('--carts', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        ingredient_ids = list(Ingredient.objects.values_list('pk', flat=True))
+        tag_ids = list(Tag.objects.values_list('pk', flat=True))
+        if not ingredient_ids or not tag_ids:
+            print('Сначала загрузите ингредиенты и теги.')
+            return
+
+        user_ids = self.create_users(options['users'], batch_size)
+        author_weights = power_weights(len(user_ids), 1.1, rng)
+        recipe_ids = self.create_recipes(
+            rng,
+            user_ids,
+            author_weights,
+            options['recipes'],
+            batch_size,
+        )
+        self.create_recipe_relations(
+            rng,
+            recipe_ids,
+            ingredient_ids,
+            tag_ids,
+            batch_size,
+        )
+        bulk_create_chunked(
+            Follow,
+            (
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id in user_ids
+                for author_id in pick_distinct(
+                    rng,
+                    user_ids,
+                    author_weights,
+                    int(rng.expovariate(1 / options['follows'])),
+                )
+                if author_id != user_id
+            ),
+            batch_size,
+        )
+        recipe_weights = power_weights(len(recipe_ids), 1.2, rng)
+        for model, mean in (
+            (FavoriteRecipe, options['favorites']),
+            (ShoppingCart, options['carts']),
+        ):
+            bulk_create_chunked(
+                model,
+                (
+                    model(user_id=user_id, recipe_id=recipe_id)
+                    for user_id in user_ids
+                    for recipe_id in pick_distinct(
+                        rng,
+                        recipe_ids,
+                        recipe_weights,
+                        int(rng.expovariate(1 / mean)) if mean else 0,
+                    )
+                ),
+                batch_size,
+            )
+
+        call_command('rebuild_shopping_lists', batch_size=batch_size)
+        call_command('reconcile_counters', batch_size=batch_size)
+        autocomplete.invalidate()
+        invalidate_recipes()
+        invalidate_shared()
+        print(
+            f'Создано пользователей: {len(user_ids)}, '
+            f'рецептов: {len(recipe_ids)}.',
+        )
+
+    def create_users(self, count, batch_size):
+        last_id = User.objects.aggregate(last=Max('pk'))['last']
+        offset = (last_id or 0) + 1
+        password = make_password('generated-password')
+        bulk_create_chunked(
+            User,
+            (
+                User(
+                    username=f'user{offset + number}',
+                    email=f'user{offset + number}@example.com',
+                    first_name='Тестовый',
+                    last_name=f'Пользователь {offset + number}',
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            batch_size,
+        )
+        user_ids = new_ids(User, last_id)
+        bulk_create_chunked(
+            UserStats,
+            (UserStats(user_id=user_id) for user_id in user_ids),
+            batch_size,
+        )
+        return user_ids
+
+    def create_recipes(self, rng, user_ids, author_weights, count, batch_size):
+        last_id = Recipe.objects.aggregate(last=Max('pk'))['last']
+        authors = rng.choices(user_ids, cum_weights=author_weights, k=count)
+        bulk_create_chunked(
+            Recipe,
+            (
+                Recipe(
+                    author_id=author_id,
+                    name=f'{rng.choice(ADJECTIVES)} {rng.choice(WORDS)}',
+                    text=' '.join(rng.choices(WORDS + ADJECTIVES, k=30)),
+                    cooking_time=max(1, int(rng.lognormvariate(3.3, 0.6))),
+                )
+                for author_id in authors
+            ),
+            batch_size,
+        )
+        return new_ids(Recipe, last_id)
+
+    def create_recipe_relations(
+        self,
+        rng,
+        recipe_ids,
+        ingredient_ids,
+        tag_ids,
+        batch_size,
+    ):
+        ingredient_weights = power_weights(len(ingredient_ids), 0.9, rng)
+        bulk_create_chunked(
+            RecipeIngredient,
+            (
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=rng.choice((1, 2, 5, 10, 50, 100, 200, 500)),
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in pick_distinct(
+                    rng,
+                    ingredient_ids,
+                    ingredient_weights,
+                    rng.randint(3, 12),
+                )
+            ),
+            batch_size,
+        )
+        bulk_create_chunked(
+            Recipe.tags.through,
+            (
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in rng.sample(
+                    tag_ids,
+                    rng.randint(1, min(2, len(tag_ids))),
+                )
+            ),
+            batch_size,
+        )
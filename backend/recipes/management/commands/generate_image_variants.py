@@ -0,0 +1,29 @@
+from django.core.management import BaseCommand
+
+from recipes.images import generate_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Генерация уменьшенных копий изображений рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии для всех рецептов.',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            recipes = recipes.filter(image_variants_ready=False)
+        done = 0
+        for pk in recipes.values_list('pk', flat=True).iterator():
+            try:
+                generate_variants(pk)
+            except (OSError, ValueError) as error:
+                print(f'Рецепт {pk}: {error}')
+            else:
+                done += 1
+        print(f'Обработано рецептов: {done}.')
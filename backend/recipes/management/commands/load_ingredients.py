@@ -1,28 +1,160 @@
-from csv import DictReader
+import csv
+import io
+import itertools
+import json
+import os
 
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
 
+from api.cache import invalidate_shared
+from recipes import autocomplete
 from recipes.models import Ingredient
 
+NAME_LENGTH = Ingredient._meta.get_field('name').max_length
+UNIT_LENGTH = Ingredient._meta.get_field('measurement_unit').max_length
+
+
+def read_csv(file):
+    yield from csv.DictReader(file)
+
+
+def read_json(file):
+    yield from json.load(file)
+
+
+def read_jsonl(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+    'jsonl': read_jsonl,
+}
+
+
+def clean(rows):
+    for row in rows:
+        if not isinstance(row, dict):
+            yield None
+            continue
+        name = str(row.get('name') or '').strip()
+        unit = str(row.get('measurement_unit') or '').strip()
+        if not name or not unit:
+            yield None
+        elif len(name) > NAME_LENGTH or len(unit) > UNIT_LENGTH:
+            yield None
+        else:
+            yield name, unit
 
-class Command(BaseCommand):
-    help = 'Загрузка из csv файла'
 
-    def handle(self, *args, **kwargs):
-        if Ingredient.objects.exists():
-            print('В базу уже загружены данные.')
+def batches(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
             return
+        yield batch
+
+
+def load_default(rows, batch_size):
+    inserted = total = 0
+    seen = set()
+    for batch in batches(rows, batch_size):
+        total += len(batch)
+        keys = set(batch) - seen
+        seen.update(keys)
+        existing = set(
+            Ingredient.objects.filter(
+                name__in={name for name, _ in keys},
+            ).values_list('name', 'measurement_unit'),
+        )
+        new = sorted(keys - existing)
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in new
+        )
+        inserted += len(new)
+    return inserted, total
+
+
+def load_postgresql(rows, batch_size):
+    table = Ingredient._meta.db_table
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMPORARY TABLE ingredient_import '
+            '(name varchar(%s), measurement_unit varchar(%s)) '
+            'ON COMMIT DROP',
+            [NAME_LENGTH, UNIT_LENGTH],
+        )
+        for batch in batches(rows, batch_size):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            buffer.seek(0)
+            cursor.copy_expert(
+                'COPY ingredient_import (name, measurement_unit) '
+                'FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
+            total += len(batch)
+        cursor.execute(f'LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE')
+        cursor.execute(
+            f'INSERT INTO {table} (name, measurement_unit) '
+            'SELECT DISTINCT staged.name, staged.measurement_unit '
+            'FROM ingredient_import staged '
+            f'WHERE NOT EXISTS (SELECT 1 FROM {table} existing '
+            'WHERE existing.name = staged.name '
+            'AND existing.measurement_unit = staged.measurement_unit)',
+        )
+        inserted = cursor.rowcount
+    return inserted, total
+
+
+class Command(BaseCommand):
+    help = 'Загрузка и обновление ингредиентов из csv или json файла.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='./data/ingredients.csv')
+        parser.add_argument('--format', choices=sorted(READERS))
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1][1:]
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        load = (
+            load_postgresql
+            if connection.vendor == 'postgresql'
+            else load_default
+        )
+        invalid = 0
+
+        def valid(rows):
+            nonlocal invalid
+            for row in rows:
+                if row is None:
+                    invalid += 1
+                else:
+                    yield row
+
         try:
-            with open(
-                './data/ingredients.csv',
-                'r',
-                encoding='utf-8',
-            ) as file:
-                reader = DictReader(file)
-                Ingredient.objects.bulk_create(
-                    Ingredient(**data) for data in reader
-                )
-        except ValueError:
-            print('Неопределенное значение.')
-        else:
-            print('Ингредиенты загружены.')
+            with open(path, 'r', encoding='utf-8') as file:
+                with transaction.atomic():
+                    inserted, total = load(
+                        valid(clean(READERS[file_format](file))),
+                        options['batch_size'],
+                    )
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Не удалось загрузить ингредиенты: {error}')
+        if inserted:
+            autocomplete.invalidate()
+            invalidate_shared()
+        print(
+            f'Добавлено: {inserted}, обновлено: 0, '
+            f'пропущено: {total - inserted + invalid}.',
+        )
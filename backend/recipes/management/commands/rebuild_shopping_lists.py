@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db.models import Q
+
+from recipes.models import ShoppingListItem
+from recipes.services import refresh_shopping_lists, shopping_list_totals
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересборка или проверка сохраненных списков покупок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только проверить расхождения, не исправляя их.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        user_ids = list(
+            User.objects.filter(
+                Q(cart__isnull=False) | Q(shopping_list__isnull=False),
+            )
+            .distinct()
+            .order_by('pk')
+            .values_list('pk', flat=True),
+        )
+        batch_size = options['batch_size']
+        broken = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            expected = shopping_list_totals(batch)
+            stored = {
+                (item['user'], item['ingredient']): item['amount']
+                for item in ShoppingListItem.objects.filter(
+                    user__in=batch,
+                ).values('user', 'ingredient', 'amount')
+            }
+            broken_users = {
+                user_id
+                for user_id, _ in set(expected) ^ set(stored)
+            } | {
+                user_id
+                for (user_id, ingredient_id), total in expected.items()
+                if stored.get((user_id, ingredient_id)) != total
+            }
+            broken += len(broken_users)
+            if broken_users and not options['verify']:
+                refresh_shopping_lists(broken_users)
+        action = 'найдено' if options['verify'] else 'исправлено'
+        print(
+            f'Проверено пользователей: {len(user_ids)}, '
+            f'расхождений {action}: {broken}.',
+        )
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from api.cache import invalidate_recipes
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCart
+from recipes.services import bulk_batch_size, count_subquery
+from users.models import Follow, UserStats
+
+User = get_user_model()
+
+
+def reconcile(queryset, counters, batch_size, dry_run):
+    annotations = {
+        f'actual_{field}': expression for field, expression in counters.items()
+    }
+    fixed = 0
+    last_pk = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        with transaction.atomic():
+            objs = list(
+                batch.select_for_update().annotate(**annotations)[:batch_size],
+            )
+            if not objs:
+                return fixed
+            changed = []
+            for obj in objs:
+                drift = False
+                for field in counters:
+                    actual = getattr(obj, f'actual_{field}')
+                    if getattr(obj, field) != actual:
+                        setattr(obj, field, actual)
+                        drift = True
+                if drift:
+                    changed.append(obj)
+            if changed and not dry_run:
+                queryset.model.objects.bulk_update(changed, list(counters))
+        fixed += len(changed)
+        last_pk = objs[-1].pk
+
+
+class Command(BaseCommand):
+    help = 'Сверка счетчиков избранного, покупок, рецептов и подписчиков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        missing = User.objects.filter(stats__isnull=True).values_list(
+            'pk',
+            flat=True,
+        )
+        if not dry_run:
+            objs = [UserStats(user_id=pk) for pk in missing]
+            UserStats.objects.bulk_create(
+                objs,
+                batch_size=bulk_batch_size(UserStats, objs, batch_size),
+                ignore_conflicts=True,
+            )
+        recipes = reconcile(
+            Recipe.objects.all(),
+            {
+                'favorites_count': count_subquery(FavoriteRecipe, 'recipe'),
+                'in_carts_count': count_subquery(ShoppingCart, 'recipe'),
+            },
+            batch_size,
+            dry_run,
+        )
+        users = reconcile(
+            UserStats.objects.all(),
+            {
+                'recipes_count': count_subquery(Recipe, 'author'),
+                'followers_count': count_subquery(Follow, 'author'),
+            },
+            batch_size,
+            dry_run,
+        )
+        if recipes and not dry_run:
+            invalidate_recipes()
+        print(f'Рецептов с расхождениями: {recipes}.')
+        print(f'Пользователей с расхождениями: {users}.')
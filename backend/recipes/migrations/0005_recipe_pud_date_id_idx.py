@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-17 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0004_recipe_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-pud_date", "-id"], name="recipe_pud_date_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.1 on 2026-10-17 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0005_recipe_pud_date_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="image_variants_ready",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                verbose_name="Превью изображения готовы",
+            ),
+        ),
+    ]
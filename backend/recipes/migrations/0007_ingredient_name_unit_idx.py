@@ -0,0 +1,19 @@
+# Generated by Django 4.2.1 on 2026-10-17 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0006_recipe_image_variants_ready"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(
+                fields=["name", "measurement_unit"],
+                name="ingredient_name_unit_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.1 on 2026-10-17 12:40
+
+from django.db import migrations, models
+
+CREATE_PREFIX_INDEX = """
+CREATE INDEX IF NOT EXISTS ingredient_name_upper_prefix_idx
+ON recipes_ingredient (UPPER(name) varchar_pattern_ops);
+"""
+
+DROP_PREFIX_INDEX = """
+DROP INDEX IF EXISTS ingredient_name_upper_prefix_idx;
+"""
+
+
+def create_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_PREFIX_INDEX)
+
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_PREFIX_INDEX)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0007_ingredient_name_unit_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["author", "-pud_date"],
+                name="recipe_author_pud_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipeingredient",
+            index=models.Index(
+                fields=["recipe", "ingredient", "amount"],
+                name="recipe_ingredient_amount_idx",
+            ),
+        ),
+        migrations.RunPython(create_prefix_index, drop_prefix_index),
+    ]
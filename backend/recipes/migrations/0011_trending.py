@@ -0,0 +1,88 @@
+# Generated by Django 4.2.1 on 2026-10-17 15:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0010_similarrecipe"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="favoriterecipe",
+            name="created",
+            field=models.DateTimeField(
+                null=True,
+                verbose_name="Дата добавления",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="favoriterecipe",
+            name="created",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                null=True,
+                verbose_name="Дата добавления",
+            ),
+        ),
+        migrations.AddField(
+            model_name="shoppingcart",
+            name="created",
+            field=models.DateTimeField(
+                null=True,
+                verbose_name="Дата добавления",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="shoppingcart",
+            name="created",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                null=True,
+                verbose_name="Дата добавления",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="favoriterecipe",
+            index=models.Index(fields=["created"], name="favorite_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shoppingcart",
+            index=models.Index(fields=["created"], name="cart_created_idx"),
+        ),
+        migrations.CreateModel(
+            name="RecipeTrendingScore",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="trending",
+                        serialize=False,
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "score",
+                    models.FloatField(
+                        db_index=True, verbose_name="Популярность"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Дата расчета"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Популярность рецепта",
+                "verbose_name_plural": "Популярность рецептов",
+                "ordering": ("-score",),
+            },
+        ),
+    ]
@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.expressions import Window
+from django.db.models.functions import Greatest, RowNumber
 
 User = get_user_model()
 
@@ -19,6 +22,12 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('name',)
+        indexes = [
+            models.Index(
+                fields=['name', 'measurement_unit'],
+                name='ingredient_name_unit_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.name}'
@@ -50,6 +59,45 @@ class Tag(models.Model):
         return f'{self.name}'
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_related(self):
+        return self.select_related('author').prefetch_related(
+            'tags',
+            models.Prefetch(
+                'quantity_ingredients',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient',
+                ).order_by('ingredient__name'),
+            ),
+        )
+
+    def limited_per_author(self, limit):
+        ranked = self.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[models.F('author_id')],
+                order_by=models.F('pud_date').desc(),
+            ),
+        )
+        sql, params = ranked.values('pk', 'row_number').query.sql_with_params()
+        return self.extra(
+            where=[
+                f'{self.model._meta.db_table}.id IN ('
+                f'SELECT ranked.id FROM ({sql}) ranked '
+                f'WHERE ranked.row_number <= %s)',
+            ],
+            params=(*params, limit),
+        )
+
+    def bump(self, **deltas):
+        return self.update(
+            **{
+                field: Greatest(models.F(field) + delta, 0)
+                for field, delta in deltas.items()
+            },
+        )
+
+
 class Recipe(models.Model):
     tags = models.ManyToManyField(
         Tag,
@@ -77,6 +125,11 @@ class Recipe(models.Model):
         null=True,
         upload_to='image_recipes/',
     )
+    image_variants_ready = models.BooleanField(
+        verbose_name='Превью изображения готовы',
+        default=False,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name='Описание рецепта',
     )
@@ -90,11 +143,36 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='В списках покупок',
+        default=0,
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pud_date',)
+        indexes = [
+            models.Index(
+                fields=['-pud_date', '-id'],
+                name='recipe_pud_date_id_idx',
+            ),
+            models.Index(
+                fields=['author', '-pud_date'],
+                name='recipe_author_pud_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.name}'
@@ -131,6 +209,12 @@ class RecipeIngredient(models.Model):
                 name='unique_ingredient',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'ingredient', 'amount'],
+                name='recipe_ingredient_amount_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.ingredient.name} - {self.amount}'
@@ -149,6 +233,11 @@ class FavoriteRecipe(models.Model):
         related_name='favorites',
         verbose_name='Избранный рецепт',
     )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+        null=True,
+    )
 
     class Meta:
         verbose_name = 'Избранный рецепт'
@@ -160,6 +249,9 @@ class FavoriteRecipe(models.Model):
                 name='unique_user_recipe',
             ),
         ]
+        indexes = [
+            models.Index(fields=['created'], name='favorite_created_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user} - {self.recipe.name}'
@@ -178,6 +270,11 @@ class ShoppingCart(models.Model):
         related_name='cart',
         verbose_name='Рецепт',
     )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+        null=True,
+    )
 
     class Meta:
         verbose_name = 'Покупка'
@@ -189,7 +286,154 @@ class ShoppingCart(models.Model):
                 name='unique_cart_user',
             ),
         ]
+        indexes = [
+            models.Index(fields=['created'], name='cart_created_idx'),
+        ]
 
     def __str__(self):
         list_ = [item['name'] for item in self.recipe.values('name')]
         return f'Пользователь {self.user} добавил {list_} в покупки.'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент',
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name='Общее количество',
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Списки покупок'
+        ordering = ('id',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} - {self.ingredient} - {self.amount}'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pud_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        ordering = ('-pud_date', '-id')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pud_date', '-recipe'],
+                name='feed_user_pud_date_idx',
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='feed_user_author_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} - {self.recipe}'
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Рецепт',
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожий рецепт',
+    )
+    score = models.FloatField(
+        verbose_name='Сходство',
+    )
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        ordering = ('-score', 'id')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_similar_recipe',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='similar_recipe_score_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} ~ {self.similar}'
+
+
+class RecipeTrendingScore(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Рецепт',
+    )
+    score = models.FloatField(
+        verbose_name='Популярность',
+        db_index=True,
+    )
+    updated = models.DateTimeField(
+        verbose_name='Дата расчета',
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'Популярность рецепта'
+        verbose_name_plural = 'Популярность рецептов'
+        ordering = ('-score',)
+
+    def __str__(self):
+        return f'{self.recipe} - {self.score:.2f}'
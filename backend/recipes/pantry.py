@@ -0,0 +1,207 @@
+import copy
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from foodgram.db_router import primary
+from recipes.models import RecipeIngredient
+
+VERSION_KEY = 'pantry_index_version'
+
+
+def changes_key(version):
+    return f'pantry_index_changes:{version}'
+
+
+class PantryIndex:
+    def __init__(self, rows):
+        postings = defaultdict(list)
+        ingredients = defaultdict(list)
+        for recipe_id, ingredient_id in rows:
+            postings[ingredient_id].append(recipe_id)
+            ingredients[recipe_id].append(ingredient_id)
+        self.postings = {
+            ingredient_id: np.array(sorted(recipe_ids), dtype=np.int64)
+            for ingredient_id, recipe_ids in postings.items()
+        }
+        self.recipe_ids = np.array(sorted(ingredients), dtype=np.int64)
+        self.sizes = np.array(
+            [len(ingredients[pk]) for pk in self.recipe_ids.tolist()],
+            dtype=np.int64,
+        )
+        self.ingredients = {
+            recipe_id: tuple(sorted(ingredient_ids))
+            for recipe_id, ingredient_ids in ingredients.items()
+        }
+        self.built_at = time.monotonic()
+
+    def patched(self, recipe_ids, rows):
+        changed = np.array(sorted(recipe_ids), dtype=np.int64)
+        ingredients = defaultdict(list)
+        for recipe_id, ingredient_id in rows:
+            ingredients[recipe_id].append(ingredient_id)
+        index = copy.copy(self)
+        index.postings = dict(self.postings)
+        index.ingredients = dict(self.ingredients)
+        touched = set()
+        for recipe_id in changed.tolist():
+            touched.update(self.ingredients.get(recipe_id, ()))
+            index.ingredients.pop(recipe_id, None)
+            if ingredients[recipe_id]:
+                index.ingredients[recipe_id] = tuple(
+                    sorted(ingredients[recipe_id]),
+                )
+                touched.update(ingredients[recipe_id])
+        for ingredient_id in touched:
+            postings = self.postings.get(
+                ingredient_id,
+                np.array([], dtype=np.int64),
+            )
+            postings = np.union1d(
+                postings[~np.isin(postings, changed)],
+                np.array(
+                    [
+                        recipe_id
+                        for recipe_id in changed.tolist()
+                        if ingredient_id in ingredients[recipe_id]
+                    ],
+                    dtype=np.int64,
+                ),
+            )
+            if len(postings):
+                index.postings[ingredient_id] = postings
+            else:
+                index.postings.pop(ingredient_id, None)
+        added = np.array(
+            [pk for pk in changed.tolist() if ingredients[pk]],
+            dtype=np.int64,
+        )
+        keep = ~np.isin(self.recipe_ids, changed)
+        recipe_ids = np.concatenate([self.recipe_ids[keep], added])
+        sizes = np.concatenate(
+            [
+                self.sizes[keep],
+                np.array(
+                    [len(ingredients[pk]) for pk in added.tolist()],
+                    dtype=np.int64,
+                ),
+            ],
+        )
+        order = np.argsort(recipe_ids, kind='stable')
+        index.recipe_ids = recipe_ids[order]
+        index.sizes = sizes[order]
+        return index
+
+    def match(self, ingredient_ids, limit):
+        pantry = set(ingredient_ids)
+        postings = [
+            self.postings[pk] for pk in pantry if pk in self.postings
+        ]
+        if not postings:
+            return []
+        recipe_ids, matched = np.unique(
+            np.concatenate(postings),
+            return_counts=True,
+        )
+        sizes = self.sizes[np.searchsorted(self.recipe_ids, recipe_ids)]
+        coverage = matched / sizes
+        order = np.lexsort((recipe_ids, -matched, -coverage))[:limit]
+        return [
+            {
+                'recipe': recipe_id,
+                'coverage': round(share, 4),
+                'matched': count,
+                'missing': [
+                    pk for pk in self.ingredients[recipe_id]
+                    if pk not in pantry
+                ],
+            }
+            for recipe_id, share, count in zip(
+                recipe_ids[order].tolist(),
+                coverage[order].tolist(),
+                matched[order].tolist(),
+            )
+        ]
+
+
+_lock = threading.Lock()
+_state = {'index': None, 'version': None}
+
+
+def build_index():
+    return PantryIndex(
+        RecipeIngredient.objects.values_list(
+            'recipe',
+            'ingredient',
+        ).iterator(),
+    )
+
+
+def _is_fresh(index, version):
+    return (
+        index is not None
+        and _state['version'] == version
+        and time.monotonic() - index.built_at < settings.PANTRY_INDEX_TTL
+    )
+
+
+def _patch(index, version):
+    current = _state['version']
+    if (
+        index is None
+        or current is None
+        or current >= version
+        or time.monotonic() - index.built_at >= settings.PANTRY_INDEX_TTL
+    ):
+        return None
+    keys = [changes_key(number) for number in range(current + 1, version + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys):
+        return None
+    recipe_ids = {pk for ids in changes.values() for pk in ids}
+    with primary():
+        rows = list(
+            RecipeIngredient.objects.filter(recipe__in=recipe_ids)
+            .order_by()
+            .values_list('recipe', 'ingredient'),
+        )
+    return index.patched(recipe_ids, rows)
+
+
+def get_index():
+    version = cache.get(VERSION_KEY, 0)
+    index = _state['index']
+    if _is_fresh(index, version):
+        return index
+    with _lock:
+        index = _state['index']
+        if not _is_fresh(index, version):
+            index = _patch(index, version)
+            if index is None:
+                with primary():
+                    index = build_index()
+            _state.update(index=index, version=version)
+    return index
+
+
+def _bump(recipe_ids):
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        version = 1
+        cache.set(VERSION_KEY, version, None)
+    if recipe_ids:
+        cache.set(
+            changes_key(version),
+            sorted(recipe_ids),
+            settings.PANTRY_INDEX_TTL,
+        )
+
+
+def invalidate(*recipe_ids):
+    transaction.on_commit(lambda: _bump(recipe_ids))
@@ -0,0 +1,161 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import (
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce
+
+from recipes.models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+User = get_user_model()
+
+_state = threading.local()
+
+
+def shopping_list_aggregation(user_ids, ingredient_ids=None):
+    queryset = RecipeIngredient.objects.filter(
+        recipe__cart__user__in=user_ids,
+    )
+    if ingredient_ids is not None:
+        queryset = queryset.filter(ingredient__in=ingredient_ids)
+    return (
+        queryset.values('recipe__cart__user', 'ingredient')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+
+
+def shopping_list_totals(user_ids, ingredient_ids=None):
+    return {
+        (row['recipe__cart__user'], row['ingredient']): row['total']
+        for row in shopping_list_aggregation(user_ids, ingredient_ids)
+    }
+
+
+def shopping_list_rows(user):
+    return (
+        ShoppingListItem.objects.filter(user=user)
+        .values(
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            quantity=F('amount'),
+        )
+        .order_by('ingredient__name')
+    )
+
+
+@transaction.atomic()
+def refresh_shopping_lists(user_ids, ingredient_ids=None):
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    list(
+        User.objects.select_for_update()
+        .filter(pk__in=user_ids)
+        .order_by('pk')
+        .values_list('pk', flat=True),
+    )
+    items = ShoppingListItem.objects.filter(user__in=user_ids)
+    if ingredient_ids is not None:
+        items = items.filter(ingredient__in=ingredient_ids)
+    items.delete()
+    totals = shopping_list_totals(user_ids, ingredient_ids)
+    ShoppingListItem.objects.bulk_create(
+        ShoppingListItem(
+            user_id=user_id,
+            ingredient_id=ingredient_id,
+            amount=total,
+        )
+        for (user_id, ingredient_id), total in totals.items()
+    )
+
+
+def refresh_for_recipes(recipe_ids, user_ids=None, ingredient_ids=()):
+    if user_ids is None:
+        user_ids = ShoppingCart.objects.filter(
+            recipe__in=recipe_ids,
+        ).values_list('user', flat=True)
+    ingredient_ids = set(ingredient_ids) | set(
+        RecipeIngredient.objects.filter(
+            recipe__in=recipe_ids,
+        ).values_list('ingredient', flat=True),
+    )
+    refresh_shopping_lists(user_ids, ingredient_ids)
+
+
+def deferred_recipes():
+    if not hasattr(_state, 'recipe_ids'):
+        _state.recipe_ids = set()
+    return _state.recipe_ids
+
+
+def defer_shopping_lists(recipe_ids):
+    deferred_recipes().update(recipe_ids)
+    return (
+        list(
+            ShoppingCart.objects.filter(recipe__in=recipe_ids).values_list(
+                'user',
+                flat=True,
+            ),
+        ),
+        list(
+            RecipeIngredient.objects.filter(
+                recipe__in=recipe_ids,
+            ).values_list('ingredient', flat=True),
+        ),
+    )
+
+
+def resume_shopping_lists(recipe_ids, user_ids, ingredient_ids):
+    deferred_recipes().difference_update(recipe_ids)
+    refresh_for_recipes(recipe_ids, user_ids, ingredient_ids)
+
+
+@contextmanager
+def shopping_lists_deferred(recipe_ids):
+    user_ids, ingredient_ids = defer_shopping_lists(recipe_ids)
+    try:
+        yield
+    finally:
+        deferred_recipes().difference_update(recipe_ids)
+    refresh_for_recipes(recipe_ids, user_ids, ingredient_ids)
+
+
+def bulk_batch_size(model, objs, batch_size=None):
+    limit = max(
+        connection.ops.bulk_batch_size(model._meta.concrete_fields, objs),
+        1,
+    )
+    return min(batch_size or limit, limit)
+
+
+def sample_user(username=None):
+    if username:
+        return User.objects.filter(username=username).first()
+    return (
+        User.objects.annotate(carts=Count('cart'))
+        .order_by('-carts', 'pk')
+        .first()
+    )
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
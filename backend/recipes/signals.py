@@ -0,0 +1,158 @@
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from recipes import autocomplete, pantry, similarity, timeline
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    SimilarRecipe,
+)
+from recipes.services import (
+    defer_shopping_lists,
+    deferred_recipes,
+    refresh_for_recipes,
+    refresh_shopping_lists,
+    resume_shopping_lists,
+)
+from recipes.tasks import run_in_background
+from users.models import Follow
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    autocomplete.invalidate()
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def update_pantry_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None:
+        pantry.invalidate(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def update_pantry_recipe(sender, instance, **kwargs):
+    pantry.invalidate(instance.recipe_id)
+
+
+COUNTERS = {
+    FavoriteRecipe: 'favorites_count',
+    ShoppingCart: 'in_carts_count',
+}
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+@receiver(post_save, sender=ShoppingCart)
+def recipe_added(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).bump(
+            **{COUNTERS[sender]: 1},
+        )
+
+
+@receiver(post_delete, sender=FavoriteRecipe)
+@receiver(post_delete, sender=ShoppingCart)
+def recipe_removed(sender, instance, **kwargs):
+    if instance.recipe_id not in deferred_recipes():
+        Recipe.objects.filter(pk=instance.recipe_id).bump(
+            **{COUNTERS[sender]: -1},
+        )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        refresh_for_recipes(
+            [instance.recipe_id],
+            user_ids=[instance.user_id],
+        )
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    if instance.recipe_id not in deferred_recipes():
+        refresh_for_recipes(
+            [instance.recipe_id],
+            user_ids=[instance.user_id],
+        )
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_ingredient(sender, instance, **kwargs):
+    instance._previous_ingredient = None
+    if instance.pk is not None:
+        instance._previous_ingredient = (
+            RecipeIngredient.objects.filter(pk=instance.pk)
+            .values_list('ingredient', flat=True)
+            .first()
+        )
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def update_shopping_lists(sender, instance, **kwargs):
+    if instance.recipe_id in deferred_recipes():
+        return
+    ingredient_ids = {
+        instance.ingredient_id,
+        getattr(instance, '_previous_ingredient', None),
+    }
+    ingredient_ids.discard(None)
+    refresh_shopping_lists(
+        ShoppingCart.objects.filter(recipe=instance.recipe_id).values_list(
+            'user',
+            flat=True,
+        ),
+        ingredient_ids,
+    )
+
+
+@receiver(pre_delete, sender=Recipe)
+def defer_recipe_shopping_lists(sender, instance, **kwargs):
+    instance._shopping_lists = defer_shopping_lists([instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def refresh_recipe_shopping_lists(sender, instance, **kwargs):
+    resume_shopping_lists([instance.pk], *instance._shopping_lists)
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    if created:
+        run_in_background(timeline.fan_out, instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_similar_recipes(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None:
+        run_in_background(similarity.refresh, [instance.pk])
+
+
+@receiver(pre_delete, sender=Recipe)
+def recompute_similar_recipes(sender, instance, **kwargs):
+    recipe_ids = list(
+        SimilarRecipe.objects.filter(similar=instance).values_list(
+            'recipe',
+            flat=True,
+        ),
+    )
+    if recipe_ids:
+        run_in_background(similarity.recompute, recipe_ids)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def clear_feed(sender, instance, **kwargs):
+    timeline.remove(instance.user_id, instance.author_id)
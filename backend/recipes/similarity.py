@@ -0,0 +1,226 @@
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from scipy import sparse
+
+from recipes.models import Recipe, RecipeIngredient, SimilarRecipe
+
+INGREDIENT_WEIGHT = 0.8
+TAG_WEIGHT = 0.2
+CHUNK_SIZE = 500
+
+
+def chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def neighbourhood(recipe_ids):
+    return (
+        RecipeIngredient.objects.filter(
+            ingredient__in=RecipeIngredient.objects.filter(
+                recipe__in=recipe_ids,
+            ).values('ingredient'),
+        )
+        .order_by()
+        .values('recipe')
+        .distinct()
+    )
+
+
+class RecipeMatrix:
+    def __init__(self, recipes=None):
+        queryset = Recipe.objects.order_by()
+        ingredients = RecipeIngredient.objects.order_by()
+        tags = Recipe.tags.through.objects.order_by()
+        if recipes is not None:
+            queryset = queryset.filter(pk__in=recipes)
+            ingredients = ingredients.filter(recipe__in=recipes)
+            tags = tags.filter(recipe__in=recipes)
+        self.recipe_ids = np.array(
+            sorted(queryset.values_list('pk', flat=True)),
+            dtype=np.int64,
+        )
+        self.position = {pk: row for row, pk in enumerate(self.recipe_ids)}
+        self.ingredients = self.incidence(
+            ingredients.values_list('recipe', 'ingredient'),
+        )
+        self.tags = self.incidence(tags.values_list('recipe', 'tag'))
+        self.sizes = np.asarray(self.ingredients.sum(axis=1)).ravel()
+        self.tag_sizes = np.asarray(self.tags.sum(axis=1)).ravel()
+
+    def incidence(self, pairs):
+        rows, columns, column_index = [], [], {}
+        for recipe_id, column_id in pairs.iterator():
+            row = self.position.get(recipe_id)
+            if row is not None:
+                rows.append(row)
+                columns.append(
+                    column_index.setdefault(column_id, len(column_index)),
+                )
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(len(self.recipe_ids), max(len(column_index), 1)),
+        )
+
+    def rows(self, recipe_ids):
+        return np.array(
+            [self.position[pk] for pk in recipe_ids if pk in self.position],
+            dtype=np.int64,
+        )
+
+    def scores(self, rows):
+        overlap = (self.ingredients[rows] @ self.ingredients.T).tocoo()
+        source = rows[overlap.row]
+        mask = source != overlap.col
+        source = source[mask]
+        target = overlap.col[mask].astype(np.int64)
+        shared = overlap.data[mask]
+        ingredient_score = shared / (
+            self.sizes[source] + self.sizes[target] - shared
+        )
+        shared_tags = np.asarray(
+            self.tags[source].multiply(self.tags[target]).sum(axis=1),
+        ).ravel()
+        all_tags = (
+            self.tag_sizes[source] + self.tag_sizes[target] - shared_tags
+        )
+        tag_score = np.divide(
+            shared_tags,
+            all_tags,
+            out=np.zeros_like(shared_tags),
+            where=all_tags > 0,
+        )
+        return (
+            source,
+            target,
+            INGREDIENT_WEIGHT * ingredient_score + TAG_WEIGHT * tag_score,
+        )
+
+
+def top_k(source, target, score, k):
+    order = np.lexsort((target, -score, source))
+    source, target, score = source[order], target[order], score[order]
+    starts = np.flatnonzero(np.r_[True, source[1:] != source[:-1]])
+    lengths = np.diff(np.r_[starts, len(source)])
+    rank = np.arange(len(source)) - np.repeat(starts, lengths)
+    keep = rank < k
+    return source[keep], target[keep], score[keep]
+
+
+def rebuild(matrix, recipe_ids=None):
+    if recipe_ids is None:
+        recipe_ids = matrix.recipe_ids.tolist()
+    stored = 0
+    for batch in chunks(recipe_ids):
+        rows = matrix.rows(batch)
+        neighbours = []
+        if len(rows):
+            neighbours = zip(
+                *top_k(
+                    *matrix.scores(rows),
+                    settings.SIMILAR_RECIPES_TOP_K,
+                ),
+            )
+        with transaction.atomic():
+            SimilarRecipe.objects.filter(recipe__in=batch).delete()
+            created = SimilarRecipe.objects.bulk_create(
+                [
+                    SimilarRecipe(
+                        recipe_id=int(matrix.recipe_ids[source]),
+                        similar_id=int(matrix.recipe_ids[target]),
+                        score=float(score),
+                    )
+                    for source, target, score in neighbours
+                ],
+                ignore_conflicts=True,
+            )
+        stored += len(created)
+    return stored
+
+
+def build_all():
+    return rebuild(RecipeMatrix())
+
+
+def recompute(recipe_ids):
+    return rebuild(RecipeMatrix(neighbourhood(recipe_ids)), recipe_ids)
+
+
+def merge(current, scores, changed_ids, k):
+    if len(current) >= k and any(
+        scores.get(pk, 0) < current[pk]
+        for pk in changed_ids
+        if pk in current
+    ):
+        return None
+    merged = {
+        pk: score for pk, score in current.items() if pk not in changed_ids
+    }
+    merged.update(scores)
+    return dict(
+        sorted(merged.items(), key=lambda item: (-item[1], item[0]))[:k],
+    )
+
+
+def refresh(recipe_ids):
+    changed_ids = set(recipe_ids)
+    matrix = RecipeMatrix(neighbourhood(recipe_ids))
+    stored = rebuild(matrix, sorted(changed_ids))
+    candidates = defaultdict(dict)
+    rows = matrix.rows(changed_ids)
+    if len(rows):
+        for source, target, score in zip(
+            *(values.tolist() for values in matrix.scores(rows)),
+        ):
+            candidates[int(matrix.recipe_ids[target])][
+                int(matrix.recipe_ids[source])
+            ] = score
+    affected = set(candidates)
+    affected.update(
+        SimilarRecipe.objects.filter(similar__in=changed_ids).values_list(
+            'recipe',
+            flat=True,
+        ),
+    )
+    stale = []
+    for batch in chunks(sorted(affected - changed_ids)):
+        current = defaultdict(dict)
+        for recipe_id, similar_id, score in SimilarRecipe.objects.filter(
+            recipe__in=batch,
+        ).values_list('recipe', 'similar', 'score'):
+            current[recipe_id][similar_id] = score
+        updated = {}
+        for pk in batch:
+            merged = merge(
+                current[pk],
+                candidates.get(pk, {}),
+                changed_ids,
+                settings.SIMILAR_RECIPES_TOP_K,
+            )
+            if merged is None:
+                stale.append(pk)
+            elif merged != current[pk]:
+                updated[pk] = merged
+        if updated:
+            with transaction.atomic():
+                SimilarRecipe.objects.filter(recipe__in=updated).delete()
+                SimilarRecipe.objects.bulk_create(
+                    [
+                        SimilarRecipe(
+                            recipe_id=pk,
+                            similar_id=similar_id,
+                            score=score,
+                        )
+                        for pk, neighbours in updated.items()
+                        for similar_id, score in neighbours.items()
+                    ],
+                    ignore_conflicts=True,
+                )
+            stored += sum(map(len, updated.values()))
+    if stale:
+        stored += recompute(stale)
+    return stored
@@ -0,0 +1,269 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from recipes import pantry, similarity
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+    SimilarRecipe,
+    Tag,
+)
+from recipes.services import shopping_list_totals
+from users.models import Follow, UserStats
+
+User = get_user_model()
+
+
+def ingredient_numbers(number):
+    return {number % 12, (number * 5 + 1) % 12, (number * 7 + 3) % 12}
+
+
+@override_settings(SIMILAR_RECIPES_TOP_K=10)
+class SimilarRecipesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password',
+        )
+        tags = [
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in (
+                ('Завтрак', '#E26C2D', 'breakfast'),
+                ('Обед', '#49B64E', 'lunch'),
+            )
+        ]
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(12)
+        )
+        cls.ingredients = list(Ingredient.objects.order_by('pk'))
+        cls.recipes = []
+        for number in range(120):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {number}',
+                text='Описание',
+                cooking_time=10,
+            )
+            recipe.tags.set(tags[:number % 3])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=cls.ingredients[position],
+                    amount=1,
+                )
+                for position in ingredient_numbers(number)
+            )
+            cls.recipes.append(recipe)
+
+    def stored(self):
+        return sorted(
+            (recipe_id, similar_id, round(score, 5))
+            for recipe_id, similar_id, score in (
+                SimilarRecipe.objects.values_list(
+                    'recipe',
+                    'similar',
+                    'score',
+                )
+            )
+        )
+
+    def test_build_all_stores_top_k_for_every_recipe(self):
+        stored = similarity.build_all()
+        self.assertGreater(stored, 500)
+        self.assertEqual(SimilarRecipe.objects.count(), stored)
+        self.assertEqual(
+            set(SimilarRecipe.objects.values_list('recipe', flat=True)),
+            {recipe.pk for recipe in self.recipes},
+        )
+
+    def test_refresh_matches_full_rebuild(self):
+        similarity.build_all()
+        changed = self.recipes[::15]
+        for number, recipe in enumerate(changed):
+            RecipeIngredient.objects.filter(recipe=recipe).delete()
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=self.ingredients[position],
+                    amount=1,
+                )
+                for position in ingredient_numbers(number * 11 + 4)
+            )
+        similarity.refresh([recipe.pk for recipe in changed])
+        refreshed = self.stored()
+        similarity.build_all()
+        self.assertEqual(refreshed, self.stored())
+
+
+class PantryIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password',
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(12)
+        )
+        cls.ingredients = list(Ingredient.objects.order_by('pk'))
+        cls.recipes = []
+        for number in range(20):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {number}',
+                text='Описание',
+                cooking_time=10,
+            )
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=cls.ingredients[position],
+                    amount=1,
+                )
+                for position in ingredient_numbers(number)
+            )
+            cls.recipes.append(recipe)
+
+    def assert_same_index(self, patched, built):
+        self.assertEqual(
+            patched.recipe_ids.tolist(),
+            built.recipe_ids.tolist(),
+        )
+        self.assertEqual(patched.sizes.tolist(), built.sizes.tolist())
+        self.assertEqual(patched.ingredients, built.ingredients)
+        self.assertEqual(
+            {pk: ids.tolist() for pk, ids in patched.postings.items()},
+            {pk: ids.tolist() for pk, ids in built.postings.items()},
+        )
+        pantry_ids = [ingredient.pk for ingredient in self.ingredients[:5]]
+        self.assertEqual(
+            patched.match(pantry_ids, 20),
+            built.match(pantry_ids, 20),
+        )
+
+    def test_patch_matches_full_rebuild(self):
+        index = pantry.build_index()
+        edited, removed = self.recipes[:3], self.recipes[3]
+        for number, recipe in enumerate(edited):
+            RecipeIngredient.objects.filter(recipe=recipe).delete()
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=self.ingredients[position],
+                    amount=1,
+                )
+                for position in ingredient_numbers(number * 7 + 5)
+            )
+        RecipeIngredient.objects.filter(recipe=removed).delete()
+        changed = [recipe.pk for recipe in (*edited, removed)]
+        patched = index.patched(
+            changed,
+            RecipeIngredient.objects.filter(recipe__in=changed).values_list(
+                'recipe',
+                'ingredient',
+            ),
+        )
+        self.assert_same_index(patched, pantry.build_index())
+        self.assertIn(removed.pk, index.ingredients)
+
+
+class ShoppingListItemTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='buyer',
+            email='buyer@example.com',
+            password='password',
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(4)
+        )
+        cls.ingredients = list(Ingredient.objects.order_by('pk'))
+        cls.recipes = []
+        for number in range(3):
+            recipe = Recipe.objects.create(
+                author=cls.user,
+                name=f'Рецепт {number}',
+                text='Описание',
+                cooking_time=10,
+            )
+            for ingredient in cls.ingredients[number:number + 2]:
+                RecipeIngredient.objects.create(
+                    recipe=recipe,
+                    ingredient=ingredient,
+                    amount=number + 1,
+                )
+            cls.recipes.append(recipe)
+
+    def assert_list_is_current(self):
+        self.assertEqual(
+            {
+                (item.user_id, item.ingredient_id): item.amount
+                for item in ShoppingListItem.objects.all()
+            },
+            shopping_list_totals([self.user.pk]),
+        )
+
+    def test_list_follows_cart_and_recipe_changes(self):
+        for recipe in self.recipes:
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        self.assert_list_is_current()
+        item = RecipeIngredient.objects.filter(recipe=self.recipes[0]).first()
+        item.amount = 10
+        item.ingredient = self.ingredients[3]
+        item.save()
+        self.assert_list_is_current()
+        ShoppingCart.objects.filter(recipe=self.recipes[1]).delete()
+        self.assert_list_is_current()
+        self.recipes[2].delete()
+        self.assert_list_is_current()
+        self.assertTrue(ShoppingListItem.objects.exists())
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, cls.reader = (
+            User.objects.create_user(
+                username=username,
+                email=f'{username}@example.com',
+                password='password',
+            )
+            for username in ('author', 'reader')
+        )
+
+    def test_counters_follow_model_changes(self):
+        recipe = Recipe.objects.create(
+            author=self.author,
+            name='Рецепт',
+            text='Описание',
+            cooking_time=10,
+        )
+        FavoriteRecipe.objects.create(user=self.reader, recipe=recipe)
+        ShoppingCart.objects.create(user=self.reader, recipe=recipe)
+        Follow.objects.create(user=self.reader, author=self.author)
+        recipe.refresh_from_db()
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(recipe.favorites_count, 1)
+        self.assertEqual(recipe.in_carts_count, 1)
+        self.assertEqual((stats.recipes_count, stats.followers_count), (1, 1))
+        FavoriteRecipe.objects.filter(recipe=recipe).delete()
+        Follow.objects.filter(author=self.author).delete()
+        recipe.refresh_from_db()
+        stats.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 0)
+        self.assertEqual(recipe.in_carts_count, 1)
+        self.assertEqual((stats.recipes_count, stats.followers_count), (1, 0))
+        recipe.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.recipes_count, 0)
@@ -0,0 +1,121 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from recipes.models import FeedEntry, Recipe
+from users.models import Follow, UserStats
+
+
+def is_large_author(author_id):
+    return UserStats.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.FEED_FANOUT_LIMIT,
+    ).exists()
+
+
+def fan_out(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).values(
+        'author',
+        'pud_date',
+    ).first()
+    if recipe is None or is_large_author(recipe['author']):
+        return
+    followers = Follow.objects.filter(author=recipe['author']).values_list(
+        'user',
+        flat=True,
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=recipe['author'],
+                pud_date=recipe['pud_date'],
+            )
+            for user_id in followers.iterator()
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    if is_large_author(author_id):
+        return
+    recipes = (
+        Recipe.objects.filter(author=author_id)
+        .order_by('-pud_date', '-id')
+        .values_list('pk', 'pud_date')[:settings.FEED_BACKFILL_SIZE]
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                pud_date=pud_date,
+            )
+            for recipe_id, pud_date in recipes
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def remove(user_id, author_id):
+    FeedEntry.objects.filter(user=user_id, author=author_id).delete()
+
+
+def encode_cursor(pud_date, recipe_id):
+    position = f'{pud_date.isoformat()}|{recipe_id}'
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        pud_date, recipe_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        )
+        pud_date = parse_datetime(pud_date)
+        recipe_id = int(recipe_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if pud_date is None:
+        return None
+    return pud_date, recipe_id
+
+
+def before(position, id_field):
+    if position is None:
+        return Q()
+    pud_date, recipe_id = position
+    return Q(pud_date__lt=pud_date) | Q(
+        pud_date=pud_date,
+        **{f'{id_field}__lt': recipe_id},
+    )
+
+
+def page(user, position, limit):
+    rows = list(
+        FeedEntry.objects.filter(before(position, 'recipe'), user=user)
+        .order_by('-pud_date', '-recipe_id')
+        .values_list('pud_date', 'recipe')[:limit + 1],
+    )
+    large_authors = list(
+        Follow.objects.filter(
+            user=user,
+            author__stats__followers_count__gt=settings.FEED_FANOUT_LIMIT,
+        ).values_list('author', flat=True),
+    )
+    if large_authors:
+        rows += (
+            Recipe.objects.filter(
+                before(position, 'id'),
+                author__in=large_authors,
+            )
+            .order_by('-pud_date', '-id')
+            .values_list('pud_date', 'id')[:limit + 1]
+        )
+        rows = sorted(set(rows), reverse=True)
+    return rows[:limit + 1]
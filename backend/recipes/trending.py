@@ -0,0 +1,47 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from recipes.models import FavoriteRecipe, RecipeTrendingScore, ShoppingCart
+from recipes.services import bulk_batch_size
+
+ACTIVITY_MODELS = (FavoriteRecipe, ShoppingCart)
+
+
+def compute_scores(now=None):
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    decay = math.log(2) / settings.TRENDING_HALF_LIFE_DAYS
+    since = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    scores = defaultdict(float)
+    for model in ACTIVITY_MODELS:
+        buckets = (
+            model.objects.filter(created__gte=since)
+            .annotate(day=TruncDate('created'))
+            .values('recipe', 'day')
+            .annotate(total=Count('pk'))
+            .order_by()
+        )
+        for row in buckets.iterator():
+            age = (today - row['day']).days + 0.5
+            scores[row['recipe']] += row['total'] * math.exp(-decay * age)
+    return scores
+
+
+@transaction.atomic()
+def store_scores(scores, batch_size=None):
+    objs = [
+        RecipeTrendingScore(recipe_id=recipe_id, score=score)
+        for recipe_id, score in scores.items()
+    ]
+    RecipeTrendingScore.objects.all().delete()
+    RecipeTrendingScore.objects.bulk_create(
+        objs,
+        batch_size=bulk_batch_size(RecipeTrendingScore, objs, batch_size),
+    )
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.1 on 2026-10-17 10:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    Recipe = apps.get_model("recipes", "Recipe")
+    Follow = apps.get_model("users", "Follow")
+    UserStats = apps.get_model("users", "UserStats")
+    recipes = dict(
+        Recipe.objects.order_by()
+        .values_list("author")
+        .annotate(total=Count("pk"))
+    )
+    followers = dict(
+        Follow.objects.order_by()
+        .values_list("author")
+        .annotate(total=Count("pk"))
+    )
+    UserStats.objects.bulk_create(
+        (
+            UserStats(
+                user_id=user_id,
+                recipes_count=recipes.get(user_id, 0),
+                followers_count=followers.get(user_id, 0),
+            )
+            for user_id in User.objects.values_list("pk", flat=True).iterator()
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0001_initial"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+                (
+                    "recipes_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Количество рецептов"
+                    ),
+                ),
+                (
+                    "followers_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Количество подписчиков"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика пользователя",
+                "verbose_name_plural": "Статистика пользователей",
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
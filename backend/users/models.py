@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.functions import Greatest
 
 User = get_user_model()
 
@@ -31,3 +32,43 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'Подписчик {self.user} - автор {self.author}'
+
+
+class UserStatsQuerySet(models.QuerySet):
+    def bump(self, user_id, **deltas):
+        updates = {
+            field: Greatest(models.F(field) + delta, 0)
+            for field, delta in deltas.items()
+        }
+        if not self.filter(user_id=user_id).update(**updates) and any(
+            delta > 0 for delta in deltas.values()
+        ):
+            self.get_or_create(user_id=user_id)
+            self.filter(user_id=user_id).update(**updates)
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+    )
+
+    objects = UserStatsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return f'Статистика {self.user}'